@@ -26,14 +26,22 @@ import sys
 import os
 import re
 import json
+import atexit
+import socket
 import imaplib
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
+from datetime import datetime, timezone
 from locale import getlocale
-from pprint import pprint
+from multiprocessing import Lock, Pool
+from queue import Empty, Queue
+from random import randint
+from select import select
 from socket import gaierror
-from ssl import SSLError
-from time import mktime, sleep
-from email import message_from_bytes
+from ssl import SSLError, SSLWantReadError
+from time import monotonic, sleep
+from hashlib import blake2b
+from math import log
 from email.utils import parseaddr, parsedate_to_datetime
 
 # Third-party module imports
@@ -78,9 +86,156 @@ TIMEOUT_RECONN = 30
 # The maximum allowable limit of the timeout
 TIMEOUT_MAX = 300
 
+# Size of the buffer of the log file and seconds without messages to write the buffer
+LOG_BUFFER_SIZE = 65536
+LOG_FLUSH_INTERVAL = 1
+
+# Default total of connections that send messages to the destination server
+APPEND_CONNECTIONS = 4
+
+# Fields required in the source and destination of each credential
+CREDENTIAL_FIELDS = ('email', 'server')
+
+# Maximum size in bytes of the literals sent without waiting for the server with LITERAL-
+LITERAL_MINUS_MAX_SIZE = 4096
+
+# Maximum size in bytes of the messages sent together, in a single APPEND command (MULTIAPPEND)
+# or in APPEND commands sent before reading the responses (non-synchronizing literals)
+MULTIAPPEND_MAX_SIZE = 1048576
+
+# Default total of credentials migrated at the same time, each in its own process
+MIGRATE_ACCOUNTS = 1
+
+# Size of the blocks in which the messages are written on the socket
+APPEND_BLOCK_SIZE = 65536
+
+# Destination mailboxes with more messages keep their Message-IDs in a Bloom filter
+BLOOM_FILTER_MIN = 100000
+
+# Rate of false positives of the Bloom filter, confirmed with a search on the server
+BLOOM_FILTER_ERROR = 0.001
+
+# Seconds between the NOOP commands that keep the idle connections open
+KEEPALIVE_INTERVAL = 25
+
+# Seconds without traffic before the TCP keepalive probes, seconds between them and total of
+# probes not answered to consider lost a connection dropped without notice
+TCP_KEEPALIVE = {'TCP_KEEPIDLE': 60, 'TCP_KEEPINTVL': 30, 'TCP_KEEPCNT': 3}
+
+# Seconds waiting for new messages before restarting the IDLE, which servers end after 30 minutes
+IDLE_INTERVAL = 1500
+
+# File name with the UIDs of the messages already copied in previous runs
+CACHE_FILENAME = 'sync_cache.json'
+
+# Default total of messages requested in a single FETCH command
+FETCH_BATCH_SIZE = 500
+
+# Total of header FETCH commands sent before reading the responses, few enough that the
+# message sets of their commands fit in the buffers while the server is still answering
+HEADER_PIPELINE_SIZE = 10
+
+# Total of Message-IDs of the destination requested in a single FETCH command
+MESSAGEID_BATCH_SIZE = 5000
+
+# Total of Message-IDs searched on the destination server in a single SEARCH command
+SEARCH_BATCH_SIZE = 100
+
+# Maximum of messages and of bytes whose FETCH commands are sent before reading the responses
+FETCH_PIPELINE_SIZE = 100
+FETCH_PIPELINE_BYTES = 10485760
+
+# Size of the parts in which the messages larger than FETCH_PIPELINE_BYTES are fetched and sent
+STREAM_CHUNK_SIZE = 1048576
+
+# Regular expressions used to parse the FETCH responses
+REGEX_FETCH_MESSAGE = re.compile(rb'^(\d+) \(')
+REGEX_FETCH_LITERAL = re.compile(rb'(BODY\[[^\]]*\](?:<\d+>)?|RFC822(?:\.\w+)?) \{\d+\}$')
+REGEX_FETCH_ATTRIBUTE = re.compile(rb'(UID|INTERNALDATE|FLAGS|RFC822\.SIZE)'
+                                   rb' (\d+|"[^"]*"|\([^)]*\))')
+
+# Regular expression to get the system flags of a FETCH response
+REGEX_FLAGS = re.compile(r'\\\w+')
+
+# Regular expression of the abbreviations accepted by argparse for the help option
+REGEX_HELP = re.compile(r'^(-h|--(h|he|hel|help))$')
+
+# Regular expression to parse the attributes, hierarchy delimiter and name of a LIST response
+REGEX_LIST = re.compile(r'^\((?P<flags>[^)]*)\) (?:"(?P<delim>[^"]*)"|NIL) (?P<name>.+)$')
+
+# Regular expression to find the special folders by their attribute or name
+REGEX_SPECIAL_FOLDER = re.compile(r'[\\|.](Sent|Drafts|Junk|Trash|Archive)')
+
+# Mailbox attributes of the folders that are not copied
+SKIP_MAILBOX_FLAGS = {'\\NOSELECT', '\\NONEXISTENT', '\\ALL', '\\FLAGGED'}
+
+# Regular expression of the Message-IDs that can be sent in a quoted string without escaping
+REGEX_QUOTED_SAFE = re.compile(r'^[ !#-\[\]-~]+$')
+
+# Regular expression of the blank line that ends the message header
+REGEX_HEADER_END = re.compile(rb'\r?\n\r?\n')
+
+# Regular expression to find line breaks that are not CRLF
+REGEX_BARE_EOL = re.compile(rb'\r(?!\n)|(?<!\r)\n')
+
+# Regular expression to get the Message-ID directly from the raw header
+REGEX_MESSAGE_ID = re.compile(rb'^message-id:[ \t]*(?:\r?\n[ \t]+)?<?([^<>\s]+)>?',
+                              re.IGNORECASE | re.MULTILINE)
+
+# Regular expression to get the From and To fields, with their folded lines, from the raw header
+REGEX_ADDRESS = re.compile(rb'^(from|to):[ \t]*(.*(?:\r?\n[ \t].*)*)',
+                           re.IGNORECASE | re.MULTILINE)
+
+# Regular expression to get the Date directly from the raw header
+REGEX_DATE = re.compile(rb'^date:[ \t]*(.+?)\r?$', re.IGNORECASE | re.MULTILINE)
+
+# Regular expression of the characters of an email address not kept in its token file name
+REGEX_TOKEN_FILENAME = re.compile(r'[^\w._-]+')
+
 # Version script
 VERSION = '1.0.2'
 
+class BloomFilter:
+    """Set of strings that uses a fixed number of bits for each value.
+
+       A value not added is found only at the rate of false positives, so a value
+       found must be confirmed elsewhere, while a value not found was never added.
+    """
+
+    def __init__(self, capacity: int, error_rate = BLOOM_FILTER_ERROR):
+        """Construction method with the size needed for the values.
+
+            - capacity: the expected total of values;
+            - error_rate: the rate of false positives with that total.
+        """
+
+        self._size = max(int(-capacity * log(error_rate) / log(2) ** 2), 8)
+        self._hashes = max(round(self._size / capacity * log(2)), 1)
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, value: str):
+        """Gets the positions of the bits of the value, using double hashing."""
+
+        digest = blake2b(value.encode(errors = 'replace'), digest_size = 16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self._size for i in range(self._hashes))
+
+    def add(self, value: str):
+        """Adds the value to the filter."""
+
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & 1 << (position & 7)
+                   for position in self._positions(value))
+
+
+class ReconnectError(Exception):
+    """All the attempts to reconnect with the mail servers failed."""
+
+
 class SyncImapEmail:
     """The script copies all messages from one email to another using the IMAP protocol.
 
@@ -97,11 +252,20 @@ class SyncImapEmail:
         "argparse_help": "# Show this help message and exit.",
         "argparse_version": "# Show script version number and exit.",
         "argparse_debug": "# Enables debugging and displays details with exception errors.",
+        "argparse_verbose": "# Displays the progress of each message, not just of each folder.",
         "argparse_language": "# Set language code for messages.",
         "argparse_gen_tokens": "# Just generate the tokens without starting the migration.",
         "argparse_no_logs": "# Message log will not be saved.",
-        "argparse_timeout": "# Set reconnection attempt timeout. Default: {} second(s)",
+        "argparse_no_cache": "# Do not use the cache of messages already copied in previous runs.",
+        "argparse_timeout": ("# Set the timeout of the first reconnection attempt, doubled on each"
+                             " new attempt up to {1} seconds. Default: {0} second(s)"),
         "argparse_attempts": "# Set the total reconnection attempts. Default: {} attempt(s)",
+        "argparse_connections": ("# Set the total connections that send messages to the"
+                                 " destination server. Default: {} connection(s)"),
+        "argparse_accounts": ("# Set the total credentials migrated at the same time."
+                              " Default: {} credential(s)"),
+        "argparse_watch": ("# After the migration, keep waiting for new messages in the inbox of"
+                           " the source emails to copy them."),
         "auth_server_email": "Authenticating with email and password on the mail server...",
         "auth_server_token": "Authenticating with OAUTH2 token on mail server...",
         "auth_server_error": "Error authenticating to mail server.",
@@ -111,6 +275,8 @@ class SyncImapEmail:
                                      " server."),
         "clock_timeout_second": "Time left: {} seconds...",
         "conn_fail_reconn": "Connection failed. Reconnecting in {} seconds. (Attempt: {}/{})...",
+        "conn_pool_partial": ("Only {} of {} connections were opened to send messages, the"
+                              " destination server may limit the connections per user."),
         "connect_server": "Connecting to mail server...",
         "connect_server_error": "Error connecting to the mail server.",
         "connect_server_verify": "Verify that the email configuration is correct:",
@@ -125,7 +291,7 @@ class SyncImapEmail:
         "fetch_src_folder": "Downloading message from folder {} on source server...",
         "fetch_src_error": "Error trying to fetch message from folder {} on source server.",
         "flags_src_error": "Error trying to get message flags from origin server.",
-        "flags_add_dst_error": "Error trying to add flags to message on destination server.",
+        "folder_src_copied": "All messages in folder {} have already been copied.",
         "folder_src_empty": "The folder {} is empty on the source server.",
         "header_src_error": "Error trying to get message header from origin server.",
         "lang_found": "The language set is: {} (english United States).",
@@ -137,12 +303,17 @@ class SyncImapEmail:
         "list_src_folders_error": "Error trying to get list of folders on source server.",
         "list_dst_folders": "Getting the list of folders on the destination server...",
         "list_dst_folders_error": "Error trying to get list of folders on destination server.",
+        "list_dst_messageids": "Getting the Message-IDs of folder {} on destination server...",
+        "list_dst_messageids_error": ("Error trying to get the Message-IDs of folder {} on"
+                                      " destination server."),
         "log_check": "Check the log file if there were no errors during the migration process.",
         "log_filename": "Log file name: {}",
         "message_dst_exists": "Message already exists in folder {} on destination server.",
         "messageid_not_found": "Message-ID not found in header.",
         "migrate_start": "Starting migration of email <{}>...",
         "migrate_finish": "Finished migrating email <{}>.",
+        "migrate_stopped": ("Migration of email <{}> stopped, the connection to the server"
+                            " could not be restored."),
         "migrate_success": "Completed the email migration process.",
         "nodename_serv_error": "Error trying to access host address \"{}\".",
         "nodename_serv_verify": "Verify that your Internet connection is working.",
@@ -161,9 +332,19 @@ class SyncImapEmail:
         "select_dst_folder": "Selecting folder {} of destination server...",
         "select_dst_folder_error": "Error trying to select folder {} on destination server.",
         "start_conn_server_src": "Start connection and authentication with source server.",
-        "start_conn_server_dst": "Start connection and authentication with destination server."
+        "start_conn_server_dst": "Start connection and authentication with destination server.",
+        "watch_inbox": "Waiting for new messages in the inbox of the source emails...",
+        "watch_new_msgs": "New messages in the inbox of email <{}>.",
+        "watch_no_idle": ("The source server of email <{}> does not notify new messages, its inbox"
+                          " will not be watched.")
     }
 
+    # Lock of the cache file, shared by the processes that migrate credentials in parallel
+    _cache_lock = None
+
+    # Lock of the OAuth2 token files, used by the connections that log in at the same time
+    _token_lock = threading.Lock()
+
     @property
     def attempts(self) -> int:
         """Property for getting and setting the `_attempts` attribute."""
@@ -174,6 +355,26 @@ class SyncImapEmail:
         if isinstance(value, int):
             self._attempts = value
 
+    @property
+    def connections(self) -> int:
+        """Property for getting and setting the `_connections` attribute."""
+        return self._connections
+
+    @connections.setter
+    def connections(self, value: int):
+        if isinstance(value, int) and value > 0:
+            self._connections = value
+
+    @property
+    def accounts(self) -> int:
+        """Property for getting and setting the `_accounts` attribute."""
+        return self._accounts
+
+    @accounts.setter
+    def accounts(self, value: int):
+        if isinstance(value, int) and value > 0:
+            self._accounts = value
+
     @property
     def timeout(self) -> int:
         """Property for getting and setting the `_timeout` attribute."""
@@ -198,18 +399,41 @@ class SyncImapEmail:
         if isinstance(value, bool):
             self._debug = value
 
-    def __init__(self, language = getlocale()[0], auto_start = True, no_logs = False):
+    @property
+    def verbose(self) -> bool:
+        """Property for getting and setting the `_verbose` attribute."""
+        return self._verbose
+
+    @verbose.setter
+    def verbose(self, value: bool):
+        if isinstance(value, bool):
+            self._verbose = value
+
+    @property
+    def watch(self) -> bool:
+        """Property for getting and setting the `_watch` attribute."""
+        return self._watch
+
+    @watch.setter
+    def watch(self, value: bool):
+        if isinstance(value, bool):
+            self._watch = value
+
+    def __init__(self, language = getlocale()[0], auto_start = True, no_logs = False,
+                 no_cache = False):
         """Construction method for initial preparation of the class.
 
             - language: set language code for messages;
             - auto_start: starts the migration automatically;
-            - no_logs: message log will not be saved.
+            - no_logs: message log will not be saved;
+            - no_cache: the cache of messages already copied will not be used.
         """
 
         # Checks if you want to save the log file and sets the name to the current date
         if '--no-logs' not in sys.argv and not no_logs:
             now = datetime.now()
             self._log_filename = f"log_{now.strftime('%Y%m%d_%H%M%S')}.txt"
+            self._start_log_writer()
 
         # Check which language will be set
         lang_hidden = True
@@ -217,7 +441,7 @@ class SyncImapEmail:
             lang_index = sys.argv.index('--language')
             if lang_index < len(sys.argv) - 1:
                 language = sys.argv[lang_index + 1]
-                if not any(re.match(r'^(-h|--(h|he|hel|help))$', arg) for arg in sys.argv):
+                if not any(REGEX_HELP.match(arg) for arg in sys.argv):
                     lang_hidden = False
         elif not language or not os.path.exists(f'lang/{language.lower()}.json'):
             language = LANGUAGE_DEFAULT
@@ -231,9 +455,19 @@ class SyncImapEmail:
             self._parser_args = None
 
         self._debug = False
+        self._verbose = False
+        self._watch = False
         self._timeout = TIMEOUT_RECONN
         self._attempts = ATTEMPTS_RECONN
+        self._connections = APPEND_CONNECTIONS
+        self._accounts = MIGRATE_ACCOUNTS
+        self._no_cache = no_cache
+        self._cache = None
         self._mail = {}
+        self._sessions = {}
+        self._tokens = {}
+        self._watching = {}
+        self._mailboxes_ids = {}
         if not auto_start:
             return
 
@@ -244,9 +478,57 @@ class SyncImapEmail:
 
             self.start(credentials)
         except KeyboardInterrupt:
+            self._save_cache()
             self._log_print(LF + EMOJI[11] + self._msg['script_interrupted'])
             sys.exit()
 
+    def __getstate__(self):
+        """Gets the attributes sent to the processes that migrate credentials in parallel."""
+
+        state = self.__dict__.copy()
+        state['_msg'] = self._msg
+        state['_sessions'] = {}
+        state['_tokens'] = {}
+        state['_watching'] = {}
+        state['_mailboxes_ids'] = {}
+        state.pop('_log_queue', None)
+        state.pop('_log_thread', None)
+        return state
+
+    def __setstate__(self, state: dict):
+        """Restores the attributes in the processes that migrate credentials in parallel."""
+
+        self.__dict__.update(state)
+        if hasattr(self, '_log_filename'):
+            self._start_log_writer()
+
+    @staticmethod
+    def _init_process(cache_lock):
+        """Shares the lock of the cache file with the processes of the pool.
+
+            - cache_lock: the lock used to save the cache file.
+        """
+
+        SyncImapEmail._cache_lock = cache_lock
+
+    def _migrate_process(self, credential: dict):
+        """Migrate a credential in one of the processes of the pool.
+
+            - credential: the source and destination email credentials.
+        """
+
+        try:
+            if not self._no_cache:
+                self._cache = self._load_cache()
+            self._migrate(credential['src'], credential['dst'])
+            self._close_sessions()
+        except KeyboardInterrupt:
+            self._save_cache()
+        finally:
+            # The processes of the pool exit without calling the `atexit` functions
+            if hasattr(self, '_log_filename'):
+                self._stop_log_writer()
+
     def _set_language(self, language: str, hidden_msg = False):
         """Set language and load messages.
 
@@ -283,36 +565,74 @@ class SyncImapEmail:
                             help = self._msg['argparse_version'])
         parser.add_argument('--debug', action = 'store_true',
                             help = self._msg['argparse_debug'])
+        parser.add_argument('--verbose', action = 'store_true',
+                            help = self._msg['argparse_verbose'])
         parser.add_argument('--language', metavar = 'CODE',
                             help = self._msg['argparse_language'])
         parser.add_argument('--gen-tokens', action = 'store_true',
                             help = self._msg['argparse_gen_tokens'])
         parser.add_argument('--no-logs', action = 'store_true',
                             help = self._msg['argparse_no_logs'])
+        parser.add_argument('--no-cache', action = 'store_true',
+                            help = self._msg['argparse_no_cache'])
         parser.add_argument('--timeout', metavar = 'N_SECOND',
-                            help = self._msg['argparse_timeout'].format(TIMEOUT_RECONN))
+                            help = self._msg['argparse_timeout']
+                            .format(TIMEOUT_RECONN, TIMEOUT_MAX))
         parser.add_argument('--attempts', metavar = 'NUMBER',
                             help = self._msg['argparse_attempts'].format(ATTEMPTS_RECONN))
+        parser.add_argument('--connections', metavar = 'NUMBER',
+                            help = self._msg['argparse_connections'].format(APPEND_CONNECTIONS))
+        parser.add_argument('--accounts', metavar = 'NUMBER',
+                            help = self._msg['argparse_accounts'].format(MIGRATE_ACCOUNTS))
+        parser.add_argument('--watch', action = 'store_true',
+                            help = self._msg['argparse_watch'])
         self._parser_args = parser.parse_args()
 
-    def _log_print(self, message: str, use_pprint = False):
+    def _log_print(self, message: str):
         """Print the values in sys.stdout and append to the log file.
 
-            - message: the text message from stdout;
-            - use_pprint: to use the `pprint` command instead of `print`.
+            - message: the text message from stdout.
         """
 
-        if use_pprint:
-            pprint(message)
-            sys.stdout.flush()
-        else:
-            print(message, flush = True)
+        print(message, flush = True)
         if not hasattr(self, '_log_filename'):
             return
-        if use_pprint:
-            message = repr(message)
-        with open(self._log_filename, 'a', encoding = CODE) as file:
+        self._log_queue.put(message)
+
+    def _start_log_writer(self):
+        """Start the thread that writes the log file in the background."""
+
+        self._log_queue = Queue()
+        self._log_thread = threading.Thread(target = self._log_writer, daemon = True)
+        self._log_thread.start()
+        atexit.register(self._stop_log_writer)
+
+    def _stop_log_writer(self):
+        """Wait for the remaining messages to be written and stop the log thread."""
+
+        self._log_queue.put(None)
+        self._log_thread.join()
+
+    def _log_writer(self):
+        """Write the messages of the log queue, opening the file on the first message."""
+
+        file = None
+        while True:
+            try:
+                message = self._log_queue.get(timeout = LOG_FLUSH_INTERVAL)
+            except Empty:
+                # The buffer is written when no message arrives within the interval
+                if file:
+                    file.flush()
+                continue
+            if message is None:
+                break
+            if not file:
+                file = open(self._log_filename, 'a', encoding = CODE,
+                            buffering = LOG_BUFFER_SIZE)
             file.write(message + LF)
+        if file:
+            file.close()
 
     def _imap_conn(self, host: str, port: int, security: str):
         """Connect via IMAP on host and port with some security.
@@ -330,6 +650,16 @@ class SyncImapEmail:
             rtn = imaplib.IMAP4(host, port)
             if security and security.upper() == 'STARTTLS':
                 rtn.starttls()
+
+        # A connection dropped without notice fails the command waiting for its response,
+        # instead of blocking the migration, with options not available on all systems
+        rtn.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in TCP_KEEPALIVE.items():
+            if hasattr(socket, option):
+                try:
+                    rtn.sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+                except OSError:
+                    pass
         return rtn
 
     def _auth_server(self, cred: dict):
@@ -346,12 +676,12 @@ class SyncImapEmail:
             self._log_print(LF + EMOJI[11] + self._msg['nodename_serv_error']
                             .format(cred.get('server')))
             self._log_print(LF + EMOJI[1] + self._msg['nodename_serv_verify'])
-        except (ConnectionRefusedError, SSLError) as error:
+        except (OSError, imaplib.IMAP4.error) as error:
             self._log_print(LF + EMOJI[11] + self._msg['connect_server_error'])
             if self._debug:
                 self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(error))
             self._log_print(LF + EMOJI[1] + self._msg['connect_server_verify'])
-            self._log_print(cred, use_pprint= True)
+            self._log_print(json.dumps(cred, separators = (',', ':'), default = str))
 
         if not 'imap' in locals():
             return 'NO'
@@ -359,7 +689,8 @@ class SyncImapEmail:
         # Authenticate a connection to IMAP server
         if cred.get('security', '').upper() == 'OAUTH2':
             oauth2 = True
-            token, token_file = self.generate_token(cred['email'])
+            with self._token_lock:
+                token, token_file = self.generate_token(cred['email'])
             auth_string = f"user={cred['email']}\1auth=Bearer {token}\1\1"
             self._log_print(EMOJI[9] + self._msg['auth_server_token'])
         else:
@@ -370,83 +701,233 @@ class SyncImapEmail:
                 imap.authenticate('XOAUTH2', lambda x: auth_string)
             else:
                 imap.login(cred.get('email'), cred.get('password', ''))
+        except OSError as error:
+            # The connection lost while logging in is not an authentication error
+            self._log_print(LF + EMOJI[11] + self._msg['connect_server_error'])
+            if self._debug:
+                self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(error))
+            return 'NO'
         except imaplib.IMAP4.error as error:
             self._log_print(LF + EMOJI[11] + self._msg['auth_server_error'])
             if self._debug:
                 self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(error))
             if oauth2:
-                os.remove(token_file)
+                # The token rejected is not used again by the next logins of this run
+                with self._token_lock:
+                    self._tokens.pop(cred['email'], None)
+                    if os.path.exists(token_file):
+                        os.remove(token_file)
             else:
                 self._log_print(LF + EMOJI[1] + self._msg['auth_server_verify'])
             return 'NO'
 
+        # Servers usually announce more capabilities after the login, such as MULTIAPPEND
+        capabilities = imap.untagged_responses.pop('CAPABILITY', None)
+        if capabilities:
+            imap.capabilities = tuple(capabilities[-1].decode('ascii', 'replace').upper().split())
+
         return 'OK', imap
 
+    def _get_session(self, cred: dict):
+        """Gets a session left open by a previous migration with the same credential,
+           or connect and authenticate a new one.
+
+            - cred: the email credential.
+        """
+
+        sessions = self._sessions.get(self._session_key(cred), [])
+        while True:
+            # The connections logged in at the same time take the sessions concurrently
+            try:
+                imap = sessions.pop()
+            except IndexError:
+                break
+            try:
+                if imap.noop()[0] == 'OK':
+                    return 'OK', imap
+            except (imaplib.IMAP4.error, OSError):
+                pass
+            self._shutdown(imap)
+        return self._auth_server(cred)
+
+    def _session_key(self, cred: dict):
+        """Gets the key of the sessions that can be reused by the credential.
+
+            - cred: the email credential.
+        """
+
+        return (cred.get('server'), cred.get('port'), cred.get('security'), cred.get('email'))
+
+    def _shutdown(self, imap):
+        """Close the socket of a connection lost or no longer used, ignoring errors.
+
+            - imap: the connection to close.
+        """
+
+        try:
+            imap.shutdown()
+        except OSError:
+            pass
+
+    def _close_sessions(self):
+        """Log out the sessions left open by the migrations."""
+
+        for sessions in self._sessions.values():
+            while sessions:
+                try:
+                    sessions.pop().logout()
+                except (imaplib.IMAP4.error, OSError):
+                    pass
+
     def _connect(self):
         """Make email connections."""
 
-        for key, mail in self._mail.items():
+        for key in self._mail:
             self._log_print(EMOJI[9] + self._msg[f'start_conn_server_{key}'])
-            status, data = self._auth_server(mail['cred'])
-            if status != 'OK':
-                self._disconnect()
-                return False
-            mail['imap'] = data
 
+        # The source and destination connections, and the ones used exclusively to send
+        # messages to the destination server, are logged in at the same time since each
+        # login waits for several round trips
+        creds = [mail['cred'] for mail in self._mail.values()]
+        creds += [self._mail['dst']['cred']] * self._connections
+        with ThreadPoolExecutor(len(creds)) as executor:
+            sessions = list(executor.map(self._get_session, creds))
+        for mail, (status, data) in zip(self._mail.values(), sessions):
+            if status == 'OK':
+                mail['imap'] = data
+        self._mail['dst']['pool'] = Queue()
+        for status, data in sessions[len(self._mail):]:
+            if status == 'OK':
+                self._mail['dst']['pool'].put({'cred': self._mail['dst']['cred'], 'imap': data})
+        # The logins refused by a connection limit are any of them, including the main one
+        if not self._mail['dst'].get('imap') and not self._mail['dst']['pool'].empty():
+            self._mail['dst']['imap'] = self._mail['dst']['pool'].get()['imap']
+        if not all(mail.get('imap') for mail in self._mail.values()):
+            self._disconnect()
+            return False
+
+        # With fewer connections than asked, the messages are sent only by the ones opened
+        connections = self._mail['dst']['pool'].qsize()
+        if connections < self._connections:
+            self._log_print(LF + EMOJI[1] + self._msg['conn_pool_partial']
+                            .format(connections, self._connections))
+        # With a single destination login, the main connection also sends the messages,
+        # each send waited before the next command, as in `_submit_appends`
+        self._mail['dst']['shared'] = not connections
+        if not connections:
+            self._mail['dst']['pool'].put(self._mail['dst'])
+        self._mail['dst']['connections'] = max(connections, 1)
+
+        self._keepalive_time = monotonic()
         return True
 
-    def _reconnect(self):
-        """Try to reconnect with the mails servers."""
+    def _keepalive(self):
+        """Send a NOOP to the connections not in use, so the servers do not close them
+        for inactivity while the others are busy. Failures are left to the next command."""
+
+        if monotonic() - self._keepalive_time < KEEPALIVE_INTERVAL:
+            return
+        self._keepalive_time = monotonic()
+
+        conns = []
+        pool = self._mail.get('dst', {}).get('pool')
+        while pool is not None:
+            try:
+                conns.append(pool.get_nowait())
+            except Empty:
+                break
+        try:
+            # The inboxes watched keep the new messages notified in the NOOP response
+            for imap in [mail['imap'] for mail in self._mail.values() if mail.get('imap')] + [
+                    conn['imap'] for conn in conns + list(self._watching.values())]:
+                try:
+                    imap.noop()
+                    # Changes made by other clients are not used and would mix with the fetches
+                    imap.untagged_responses.pop('FETCH', None)
+                except (imaplib.IMAP4.error, OSError):
+                    continue
+        finally:
+            for conn in conns:
+                pool.put(conn)
+
+    def _reconnect(self, conn: dict = None):
+        """Try to reconnect with the mails servers.
+
+            - conn: reconnect only this connection of the destination pool.
+        """
 
         for attempt in range(1, self._attempts + 1):
+            # The wait doubles on each attempt, so longer outages do not exhaust the attempts,
+            # plus up to 10% at random so the pool connections do not all retry at once
+            timeout = min(self._timeout * 2 ** (attempt - 1), TIMEOUT_MAX)
+            timeout += randint(0, timeout // 10)
             self._log_print(LF + EMOJI[11] + self._msg['conn_fail_reconn']
-                            .format(self._timeout, attempt, self._attempts))
-            for i in range(self._timeout):
+                            .format(timeout, attempt, self._attempts))
+            for i in range(timeout):
                 text = (CR + EMOJI[10] + self._msg['clock_timeout_second']
-                        .format(self._timeout - i))
+                        .format(timeout - i))
                 print(f'{text: <20}', end = '', flush = True)
                 sleep(1)
             print(f'{CR: <40}', end = '', flush = True)
 
             error_reconn = False
-            for mail in self._mail.items():
-                status, data = self._auth_server(mail[1]['cred'])
+            for mail in ([conn] if conn else self._mail.values()):
+                # The socket of the connection replaced is not left open
+                if mail.get('imap'):
+                    self._shutdown(mail['imap'])
+                status, data = self._auth_server(mail['cred'])
                 if status != 'OK':
                     error_reconn = True
                     break
-                mail[1]['imap'] = data
+                mail['imap'] = data
             if not error_reconn:
                 return
 
-        sys.exit(1)
+        # The migration of this credential is stopped by `_migrate`
+        raise ReconnectError('all reconnection attempts failed')
 
     def _disconnect(self):
-        """Close any open sessions and log out."""
-
-        if self._mail['src'].get('imap'):
-            if self._mail['src']['imap'].state == 'SELECTED':
-                self._mail['src']['imap'].close()
-            self._mail['src']['imap'].logout()
-
-        if self._mail['dst'].get('imap'):
-            if self._mail['dst']['imap'].state == 'SELECTED':
-                self._mail['dst']['imap'].close()
-            self._mail['dst']['imap'].logout()
+        """Close any open mailboxes and keep the sessions for the next migrations."""
+
+        conns = [mail for mail in self._mail.values() if mail.get('imap')]
+        while self._mail['dst'].get('pool') and not self._mail['dst']['pool'].empty():
+            conn = self._mail['dst']['pool'].get()
+            if conn is not self._mail['dst']:
+                conns.append(conn)
+        for conn in conns:
+            try:
+                if conn['imap'].state == 'SELECTED':
+                    conn['imap'].close()
+            except (imaplib.IMAP4.error, OSError):
+                continue
+            self._sessions.setdefault(self._session_key(conn['cred']), []).append(conn['imap'])
+            del conn['imap']
 
-    def _get_allmessages(self, src_mailbox: str):
+    def _get_allmessages(self, src_mailbox: str, last_uid: int = 0):
         """Get all messages in the source mailbox.
         
-            - src_mailbox: the source email mailbox.
+            - src_mailbox: the source email mailbox;
+            - last_uid: only the messages with a greater UID are searched.
         """
 
+        # The SELECT response already shows an empty mailbox, or one without messages
+        # newer than the checkpoint, and then there is nothing to search
+        uidnext = self._mail['src'].get('uidnext')
+        if self._mail['src'].get('exists') == 0 or (uidnext and uidnext <= last_uid + 1):
+            if not last_uid:
+                self._log_print(EMOJI[1] + self._msg['folder_src_empty'].format(src_mailbox))
+                return None
+            return []
+
+        criteria = f'UID {last_uid + 1}:*' if last_uid else 'ALL'
+
         while True:
             try:
-                if self._mail['src']['imap'].state != 'SELECTED':
-                    self._mail['src']['imap'].select(src_mailbox)
+                self._select('src', src_mailbox)
                 self._log_print(EMOJI[1] + self._msg['search_src_msgs'].format(src_mailbox))
-                status, data = self._mail['src']['imap'].search(None, 'ALL')
+                status, data = self._mail['src']['imap'].uid('SEARCH', None, criteria)
                 break
-            except (imaplib.IMAP4.abort, TimeoutError):
+            except (imaplib.IMAP4.abort, OSError):
                 self._reconnect()
             except imaplib.IMAP4.error as error:
                 status, data = 'NO', error
@@ -457,11 +938,12 @@ class SyncImapEmail:
             if self._debug:
                 self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
             data = None
-        elif not data[0]:
+        elif not data[0] and not last_uid:
             self._log_print(EMOJI[1] + self._msg['folder_src_empty'].format(src_mailbox))
             data = None
         else:
-            data = data[0].split(b' ')
+            # The range 'n:*' also returns the last UID of the mailbox when it is lower than n
+            data = [message for message in data[0].split() if int(message) > last_uid]
         return data
 
     def _find_foldername(self, src_mailbox: str):
@@ -470,15 +952,12 @@ class SyncImapEmail:
             - src_mailbox: the source email mailbox.
         """
 
-        label_default = '|'.join(['Sent', 'Drafts', 'Junk', 'Trash', 'Archive'])
-        label_default = re.search(fr'[\\|\.]+({label_default})', src_mailbox)
+        foldername = None
+        label_default = REGEX_SPECIAL_FOLDER.search(src_mailbox)
         if label_default:
-            label_default = label_default.group(1)
-            for dst_mailbox in self._mail['dst']['all_mailboxes']:
-                if re.search(fr'[\\|\.]{label_default}', dst_mailbox):
-                    foldername = dst_mailbox.split(
-                        f'"{self._mail["dst"]["separator"]}"')[-1].strip()
-        else:
+            foldername = self._mail['dst']['special_folders'].get(label_default.group(1))
+        # Without an equivalent folder in the destination, the name of the source is used
+        if not foldername:
             foldername = src_mailbox
             if (self._mail['dst']['prefix'] != self._mail['src']['prefix']
                 and foldername.upper() != 'INBOX'):
@@ -500,30 +979,55 @@ class SyncImapEmail:
     def _get_mailboxes_info(self):
         """Gets mailboxes, separator and prefix used in folders."""
 
-        for key, mail in self._mail.items():
-            while True:
-                try:
+        # The LIST is sent to both servers before reading the responses,
+        # so their round trips overlap instead of adding up
+        while True:
+            try:
+                tags, responses = {}, {}
+                for key, mail in self._mail.items():
                     self._log_print(EMOJI[1] + self._msg[f'list_{key}_folders'])
-                    status, data = mail['imap'].list()
-                    break
-                except (imaplib.IMAP4.abort, TimeoutError):
-                    self._reconnect()
-                except imaplib.IMAP4.error as error:
-                    status, data = 'NO', error
-                    break
+                    tags[key] = mail['imap']._command('LIST', '""', '*')
+                for key, mail in self._mail.items():
+                    try:
+                        status, data = mail['imap']._command_complete('LIST', tags[key])
+                        responses[key] = mail['imap']._untagged_response(status, data, 'LIST')
+                    except imaplib.IMAP4.abort:
+                        raise
+                    except imaplib.IMAP4.error as error:
+                        responses[key] = 'NO', error
+                break
+            except (imaplib.IMAP4.abort, OSError):
+                self._reconnect()
+
+        for key, mail in self._mail.items():
+            status, data = responses[key]
             if status != 'OK':
                 self._log_print(LF + EMOJI[11] + self._msg[f'list_{key}_folders_error'])
                 if self._debug:
                     self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
                 return False
 
-            mail['all_mailboxes'] = [mailbox.decode() for mailbox in data]
-            mail['separator'] = re.search('"(/|.)"', mail['all_mailboxes'][0]).group(1)
+            # Each mailbox is kept as its attributes and name, the separator
+            # is the hierarchy delimiter of the first mailbox that has one
+            mail['all_mailboxes'], mail['separator'] = [], None
+            for mailbox in data:
+                literal = None
+                # Names with special characters are sent as a literal
+                if isinstance(mailbox, tuple):
+                    mailbox, literal = mailbox
+                    literal = '"{}"'.format(literal.decode())
+                match = REGEX_LIST.match(mailbox.decode()) if mailbox else None
+                if not match:
+                    continue
+                mail['all_mailboxes'].append((match.group('flags'),
+                                              literal or match.group('name').strip()))
+                if not mail['separator'] and match.group('delim'):
+                    mail['separator'] = match.group('delim')
+            mail['separator'] = mail['separator'] or '.'
 
             # Checks if mailboxes are prefixed with 'INBOX.'.
             prefix = 'INBOX.'
-            for mailbox in mail['all_mailboxes']:
-                mailbox = mailbox.split(f'"{mail["separator"]}"')[-1].strip()
+            for _, mailbox in mail['all_mailboxes']:
                 if mailbox.upper() == 'INBOX':
                     continue
                 if mailbox.find(prefix) == -1:
@@ -531,6 +1035,15 @@ class SyncImapEmail:
                     break
             mail['prefix'] = prefix
 
+            # Names of the existing mailboxes, used to skip selecting missing folders
+            mail['names'] = {mailbox.strip('"') for _, mailbox in mail['all_mailboxes']}
+
+            # Special folders found by attribute or name, the last one of each is used
+            mail['special_folders'] = {}
+            for flags, mailbox in mail['all_mailboxes']:
+                for label in REGEX_SPECIAL_FOLDER.findall(f'{flags} {mailbox}'):
+                    mail['special_folders'][label] = mailbox
+
         return True
 
     def _set_src_mailbox(self, src_mailbox: str):
@@ -542,9 +1055,11 @@ class SyncImapEmail:
         while True:
             try:
                 self._log_print(EMOJI[1] + self._msg['select_src_folder'].format(src_mailbox))
-                status, data = self._mail['src']['imap'].select(src_mailbox)
+                status, data = self._mail['src']['imap'].select(src_mailbox, readonly = True)
+                uidvalidity = self._mail['src']['imap'].response('UIDVALIDITY')[1][0]
+                uidnext = self._mail['src']['imap'].response('UIDNEXT')[1][0]
                 break
-            except (imaplib.IMAP4.abort, TimeoutError):
+            except (imaplib.IMAP4.abort, OSError):
                 self._reconnect()
             except imaplib.IMAP4.error as error:
                 status, data = 'NO', error
@@ -554,236 +1069,1049 @@ class SyncImapEmail:
                             .format(src_mailbox))
             if self._debug:
                 self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
+        else:
+            self._mail['src']['selected'] = src_mailbox
+            self._mail['src']['uidvalidity'] = (int(uidvalidity)
+                                                if uidvalidity and uidvalidity.isdigit() else None)
+            self._mail['src']['uidnext'] = (int(uidnext)
+                                            if uidnext and uidnext.isdigit() else None)
+            self._mail['src']['exists'] = (int(data[0])
+                                           if data[0] and data[0].isdigit() else None)
         return bool(status == 'OK')
 
+    def _select(self, server: str, mailbox: str):
+        """Select the mailbox again when the connection does not have it selected, as after
+        a reconnection.
+
+            - server: 'src' or 'dst';
+            - mailbox: the mailbox needed by the next command.
+        """
+
+        mail = self._mail[server]
+        if mail['imap'].state != 'SELECTED' or mail.get('selected') != mailbox:
+            mail['imap'].select(mailbox, readonly = server == 'src')
+            mail['selected'] = mailbox
+
     def _set_dst_mailbox(self, dst_mailbox: str):
-        """Select mailbox on destination server.
+        """Select mailbox on destination server, creating it if it does not exist.
         
             - dst_mailbox: the destination email mailbox.
         """
 
+        self._mail['dst']['created'] = False
         while True:
-            # Select mailbox on destination server
-            try:
-                self._log_print(EMOJI[1] + self._msg['select_dst_folder'].format(dst_mailbox))
-                data = self._mail['dst']['imap'].select(dst_mailbox)
-            except (imaplib.IMAP4.abort, TimeoutError):
-                self._reconnect()
-                continue
-            except imaplib.IMAP4.error as error:
-                self._log_print(EMOJI[11] + self._msg['select_dst_folder_error']
-                                .format(dst_mailbox))
-                if self._debug:
-                    self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(error))
-                break
+            # Select mailbox on destination server, if it was listed
+            if dst_mailbox.strip('"') in self._mail['dst']['names']:
+                # Folders sent to the same mailbox as the previous one keep it selected
+                if (self._mail['dst']['imap'].state == 'SELECTED'
+                    and self._mail['dst'].get('selected') == dst_mailbox):
+                    return True
+                try:
+                    self._log_print(EMOJI[1] + self._msg['select_dst_folder'].format(dst_mailbox))
+                    data = self._mail['dst']['imap'].select(dst_mailbox)
+                except (imaplib.IMAP4.abort, OSError):
+                    self._reconnect()
+                    continue
+                except imaplib.IMAP4.error as error:
+                    self._log_print(EMOJI[11] + self._msg['select_dst_folder_error']
+                                    .format(dst_mailbox))
+                    if self._debug:
+                        self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(error))
+                    break
 
-            if data[0] == 'OK':
-                return True
+                if data[0] == 'OK':
+                    self._mail['dst']['selected'] = dst_mailbox
+                    return True
 
             # Create the same mailbox on the destination server
             try:
                 self._log_print(EMOJI[1] + self._msg['create_dst_folder'].format(dst_mailbox))
-                self._mail['dst']['imap'].create(dst_mailbox)
-            except (imaplib.IMAP4.abort, TimeoutError):
+                status, data = self._mail['dst']['imap'].create(dst_mailbox)
+            except (imaplib.IMAP4.abort, OSError):
                 self._reconnect()
+                continue
             except imaplib.IMAP4.error as error:
+                status, data = 'NO', error
+            # Another migration may have created the mailbox after it was listed
+            if status != 'OK' and dst_mailbox.strip('"') not in self._mail['dst']['names']:
+                self._mail['dst']['names'].add(dst_mailbox.strip('"'))
+                continue
+            if status != 'OK':
                 self._log_print(EMOJI[11] + self._msg['create_dst_folder_error']
                                 .format(dst_mailbox))
                 if self._debug:
-                    self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(error))
+                    self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
                 break
+            self._mail['dst']['names'].add(dst_mailbox.strip('"'))
+            self._mail['dst']['created'] = True
 
         return False
 
-    def _fetch_header(self, src_mailbox: str, message):
-        """Fetch message header only.
-        
+    def _parse_fetch(self, data: list, uid = False):
+        """Groups the items of a FETCH response by message UID or number.
+
+            - data: the response data returned by the FETCH command;
+            - uid: group by the UID, for the responses of the UID FETCH command.
+        """
+
+        messages = {}
+        current = None
+        for item in data:
+            text = item[0] if isinstance(item, tuple) else item
+            if not isinstance(text, bytes):
+                continue
+            match = REGEX_FETCH_MESSAGE.match(text)
+            if match:
+                current = messages.setdefault(match.group(1), {})
+            if current is None:
+                continue
+            for name, value in REGEX_FETCH_ATTRIBUTE.findall(text):
+                current[name.decode()] = value.decode()
+            literal = REGEX_FETCH_LITERAL.search(text)
+            if literal and isinstance(item, tuple):
+                current[literal.group(1).decode()] = item[1]
+
+        if not uid:
+            return messages
+        # The responses without UID are not of the command, but changes notified by the
+        # server, such as flags changed by another session, and their number could be
+        # taken for the UID of a message fetched
+        return {items['UID'].encode(): items for items in messages.values() if 'UID' in items}
+
+    def _message_set(self, messages: list):
+        """Gets the IMAP message set, with the consecutive uids joined in ranges.
+
+            - messages: the message uids in ascending order.
+        """
+
+        ranges = []
+        first = last = None
+        for message in map(int, messages):
+            if last is not None and message == last + 1:
+                last = message
+                continue
+            if last is not None:
+                ranges.append(f'{first}:{last}' if first != last else str(first))
+            first = last = message
+        if last is not None:
+            ranges.append(f'{first}:{last}' if first != last else str(first))
+        return ','.join(ranges)
+
+    def _fetch_headers(self, src_mailbox: str, messages: list):
+        """Fetch in batches only the header fields used to check and copy the messages,
+           along with the size of the messages, sending the commands of several batches at once.
+
             - src_mailbox: the source email mailbox;
-            - message: the message uid of the source mailbox.
+            - messages: the message uids of the source mailbox.
+        """
+
+        headers, sizes = {}, {}
+        commands = [('FETCH', self._message_set(messages[i:i + FETCH_BATCH_SIZE]),
+                     '(RFC822.SIZE BODY.PEEK[HEADER.FIELDS (MESSAGE-ID FROM TO DATE)])')
+                    for i in range(0, len(messages), FETCH_BATCH_SIZE)]
+        for i in range(0, len(commands), HEADER_PIPELINE_SIZE):
+            self._keepalive()
+            while True:
+                try:
+                    self._select('src', src_mailbox)
+                    statuses, data = self._uid_pipeline(self._mail['src']['imap'],
+                                                        commands[i:i + HEADER_PIPELINE_SIZE])
+                    break
+                except (imaplib.IMAP4.abort, OSError):
+                    self._reconnect()
+                except imaplib.IMAP4.error as error:
+                    statuses, data = [error], []
+                    break
+            # The headers of the batches that did not fail are still used
+            if statuses.count('OK') != len(commands[i:i + HEADER_PIPELINE_SIZE]):
+                self._log_print(EMOJI[11] + self._msg['header_src_error'])
+                if self._debug:
+                    self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(statuses))
+            for message, items in self._parse_fetch(data, uid = True).items():
+                for name, value in items.items():
+                    if name == 'RFC822.SIZE':
+                        sizes[message] = int(value)
+                    elif isinstance(value, bytes):
+                        headers[message] = value
+        return headers, sizes
+
+    def _fetch_groups(self, messages: list, sizes: dict):
+        """Split the messages in groups of up to FETCH_PIPELINE_SIZE messages and
+           FETCH_PIPELINE_BYTES bytes, so small messages are fetched many at a time.
+
+            - messages: the UID, header and Message-ID of the messages to fetch;
+            - sizes: the size of the messages in bytes, by UID.
+        """
+
+        groups, group, group_size = [], [], 0
+        for message in messages:
+            # Messages of unknown size are fetched ten at a time
+            size = sizes.get(message[0], FETCH_PIPELINE_BYTES // 10)
+            if group and (len(group) == FETCH_PIPELINE_SIZE
+                          or group_size + size > FETCH_PIPELINE_BYTES):
+                groups.append(group)
+                group, group_size = [], 0
+            group.append(message)
+            group_size += size
+        if group:
+            groups.append(group)
+        return groups
+
+    def _get_messageid(self, header: bytes):
+        """Gets the Message-ID of the message without the angle brackets.
+
+            - header: the raw message header.
+        """
+
+        msg_id = REGEX_MESSAGE_ID.search(header)
+        return msg_id.group(1).decode(errors = 'replace') if msg_id else None
+
+    def _get_addresses(self, header: bytes):
+        """Gets the email addresses of the From and To fields of the message.
+
+            - header: the raw message header.
+        """
+
+        addresses = {}
+        for field, value in REGEX_ADDRESS.findall(header):
+            addresses.setdefault(field.lower(), parseaddr(value.decode('latin-1'))[1])
+        return addresses.get(b'from', ''), addresses.get(b'to', '')
+
+    def _get_date(self, header: bytes):
+        """Gets the Date of the message as datetime, or None if it is invalid.
+
+            - header: the raw message header.
+        """
+
+        date = REGEX_DATE.search(header)
+        try:
+            return parsedate_to_datetime(date.group(1).decode('latin-1'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    def _get_dst_messageids(self, dst_mailbox: str):
+        """Gets the Message-IDs of all messages in the destination mailbox, in a set
+           and, if the mailbox is large, in a Bloom filter that replaces the set.
+
+            - dst_mailbox: the destination email mailbox.
         """
 
         while True:
             try:
-                if self._mail['src']['imap'].state != 'SELECTED':
-                    self._mail['src']['imap'].select(src_mailbox)
-                status, data = self._mail['src']['imap'].fetch(message, '(BODY.PEEK[HEADER])')
+                self._log_print(EMOJI[1] + self._msg['list_dst_messageids'].format(dst_mailbox))
+                self._select('dst', dst_mailbox)
+                status, data = self._mail['dst']['imap'].search(None, 'ALL')
                 break
-            except (imaplib.IMAP4.abort, TimeoutError):
+            except (imaplib.IMAP4.abort, OSError):
                 self._reconnect()
             except imaplib.IMAP4.error as error:
                 status, data = 'NO', error
                 break
+        total = len(data[0].split()) if status == 'OK' else 0
+
+        # The set keeps only the messages sent now when the Bloom filter is used
+        message_ids = set()
+        message_filter = BloomFilter(total) if total > BLOOM_FILTER_MIN else None
+
+        # Only the headers of one batch are kept in memory at a time
+        for first in range(1, total + 1, MESSAGEID_BATCH_SIZE):
+            self._keepalive()
+            message_set = f'{first}:{min(first + MESSAGEID_BATCH_SIZE - 1, total)}'
+            while True:
+                try:
+                    self._select('dst', dst_mailbox)
+                    status, data = self._mail['dst']['imap'].fetch(
+                        message_set, '(BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])')
+                    break
+                except (imaplib.IMAP4.abort, OSError):
+                    self._reconnect()
+                except imaplib.IMAP4.error as error:
+                    status, data = 'NO', error
+                    break
+            if status != 'OK':
+                break
+            for items in self._parse_fetch(data).values():
+                for header in items.values():
+                    msg_id = self._get_messageid(header)
+                    if msg_id:
+                        (message_ids if message_filter is None else message_filter).add(msg_id)
+
         if status != 'OK':
-            self._log_print(EMOJI[11] + self._msg['header_src_error'])
+            self._log_print(LF + EMOJI[11] + self._msg['list_dst_messageids_error']
+                            .format(dst_mailbox))
             if self._debug:
                 self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
-            data = None
-        else:
-            data = message_from_bytes(data[0][1])
-        return data
+            return None, None
+        return message_ids, message_filter
+
+    def _search_messageids(self, dst_mailbox: str, headers: list):
+        """Searches in batches the Message-IDs that are not known to be in the destination
+           mailbox or not, and the messages without Message-ID by their search criteria,
+           returning for each Message-ID or criteria searched if it was found.
 
-    def _message_exists(self, dst_mailbox: str, header):
-        """Checks if the message already exists in the recipient.
-        
             - dst_mailbox: the destination email mailbox;
-            - header: the header of the source mailbox.
+            - headers: the raw headers of the source messages.
         """
 
-        # Checks with the Message-ID if the message already exists.
-        msg_id = re.search(r'[\r\n\s]*\<?([^\<\>]+)\>?',
-                           header.get('Message-ID', ''), re.IGNORECASE)
-        if msg_id:
-            msg_id = msg_id.group(1)
-            self._log_print(LF + EMOJI[7] + f'Message-ID: <{msg_id}>')
+        msg_ids, criteria = [], []
+        message_ids = self._mail['dst']['message_ids']
+        message_filter = self._mail['dst']['message_filter']
+        for header in headers:
+            msg_id = self._get_messageid(header)
+            # A mailbox created now is empty, so there is nothing to search
+            if not msg_id and not self._mail['dst']['created']:
+                criteria.append(self._search_criteria(header))
+            # Only the Message-IDs found by the Bloom filter need to be confirmed
+            if (not msg_id or not REGEX_QUOTED_SAFE.match(msg_id)
+                or (message_ids is not None and (msg_id in message_ids
+                                                 or message_filter is None
+                                                 or msg_id not in message_filter))):
+                continue
+            msg_ids.append(msg_id)
+
+        searched = {}
+        msg_ids = list(dict.fromkeys(msg_ids))
+        for i in range(0, len(msg_ids), SEARCH_BATCH_SIZE):
+            self._keepalive()
+            batch = msg_ids[i:i + SEARCH_BATCH_SIZE]
             while True:
                 try:
-                    if self._mail['dst']['imap'].state != 'SELECTED':
-                        self._mail['dst']['imap'].select(dst_mailbox)
-                    status, data = (self._mail['dst']['imap']
-                                    .search(None, f'HEADER Message-ID "{msg_id}"'))
+                    self._select('dst', dst_mailbox)
+                    found = self._find_messageids(self._mail['dst']['imap'], batch)
                     break
-                except (imaplib.IMAP4.abort, TimeoutError):
+                except (imaplib.IMAP4.abort, OSError):
                     self._reconnect()
                 except imaplib.IMAP4.error:
-                    status = 'NO'
+                    found = None
                     break
-            if status == 'OK' and data[0]:
-                self._log_print(EMOJI[4] + self._msg['message_dst_exists'].format(dst_mailbox))
-                return True
-        else:
-            # If the Message-ID does not exist, use the
-            # search criteria with From, To and SentOn
-            self._log_print(LF + EMOJI[1] + self._msg['messageid_not_found'])
-            msg_from = parseaddr(header['From'])[1]
-            msg_to = parseaddr(header['To'])[1]
-            msg_senton = parsedate_to_datetime(header['Date']).strftime('%d-%b-%Y')
-            search_criteria = f'FROM "{msg_from}" TO "{msg_to}" SENTON "{msg_senton}"'
+            # The Message-IDs of a batch that failed are searched one at a time
+            if found is None:
+                continue
+            for msg_id in batch:
+                searched[msg_id] = msg_id in found
+
+        # The criteria can not be joined with OR, since each one must be known if it was found,
+        # so their SEARCH commands are sent together instead
+        criteria = [item for item in dict.fromkeys(criteria) if item]
+        for i in range(0, len(criteria), SEARCH_BATCH_SIZE):
+            self._keepalive()
+            batch = criteria[i:i + SEARCH_BATCH_SIZE]
             while True:
                 try:
-                    if self._mail['dst']['imap'].state != 'SELECTED':
-                        self._mail['dst']['imap'].select(dst_mailbox)
-                    status, data = self._mail['dst']['imap'].search(None, search_criteria)
+                    self._select('dst', dst_mailbox)
+                    found = self._search_pipeline(self._mail['dst']['imap'], batch)
                     break
-                except (imaplib.IMAP4.abort, TimeoutError):
+                except (imaplib.IMAP4.abort, OSError):
                     self._reconnect()
                 except imaplib.IMAP4.error:
-                    status = 'NO'
+                    found = [None] * len(batch)
                     break
-            if status == 'OK' and data[0]:
-                self._log_print(EMOJI[4] + self._msg['message_dst_exists'].format(dst_mailbox))
+            # The criteria whose search failed are searched again one at a time
+            for item, exists in zip(batch, found):
+                if exists is not None:
+                    searched[item] = exists
+        return searched
+
+    def _search_pipeline(self, imap, criteria: list):
+        """Send several SEARCH commands before reading their responses, returning for each
+           one if any message was found, or None if the search failed.
+
+            - imap: the connection with the mailbox selected;
+            - criteria: the search criteria of each command.
+        """
+
+        tags = [imap._command('SEARCH', item) for item in criteria]
+        found = []
+        for tag in tags:
+            # The responses are read up to the tag of each command, so the SEARCH response
+            # read is the one of this command
+            try:
+                status = imap._command_complete('SEARCH', tag)[0]
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error:
+                status = 'BAD'
+            data = imap.untagged_responses.pop('SEARCH', [b''])
+            found.append(bool(data[-1]) if status == 'OK' else None)
+        return found
+
+    def _search_criteria(self, header: bytes):
+        """Gets the search criteria of a message without Message-ID, with its From, To and
+           SentOn, or None if its addresses can not be sent in a quoted string.
+
+            - header: the raw header of the source message.
+        """
+
+        msg_from, msg_to = self._get_addresses(header)
+        if not all(REGEX_QUOTED_SAFE.match(address) for address in (msg_from, msg_to)
+                   if address):
+            return None
+        search_criteria = f'FROM "{msg_from}" TO "{msg_to}"'
+        msg_senton = self._get_date(header)
+        if msg_senton:
+            search_criteria += f' SENTON "{msg_senton.strftime("%d-%b-%Y")}"'
+        return search_criteria
+
+    def _find_messageids(self, imap, msg_ids: list):
+        """Searches the Message-IDs in the selected mailbox with a single SEARCH command,
+           returning the ones found, or None if the search failed.
+
+            - imap: the connection with the mailbox selected;
+            - msg_ids: the Message-IDs, all of them safe to send in a quoted string.
+        """
+
+        # The messages found by any of the Message-IDs are fetched to know which ones
+        criteria = ' '.join(['OR'] * (len(msg_ids) - 1)
+                            + [f'HEADER Message-ID "{msg_id}"' for msg_id in msg_ids])
+        status, data = imap.search(None, criteria)
+        if status == 'OK' and data[0]:
+            status, data = imap.fetch(self._message_set(data[0].split()),
+                                      '(BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])')
+        if status != 'OK':
+            return None
+        found = set()
+        for items in self._parse_fetch(data).values():
+            for header in items.values():
+                found.add(self._get_messageid(header))
+        return found
+
+    def _message_exists(self, dst_mailbox: str, header: bytes):
+        """Checks if the message already exists in the recipient.
+        
+            - dst_mailbox: the destination email mailbox;
+            - header: the raw header of the source message.
+        """
+
+        # Checks with the Message-ID if the message already exists.
+        msg_id = self._get_messageid(header)
+        if msg_id:
+            # The progress of each message is only built in verbose mode
+            if self._verbose:
+                self._log_print(LF + EMOJI[7] + f'Message-ID: <{msg_id}>')
+            exists = False
+            search = self._mail['dst']['message_ids'] is None
+            if not search:
+                exists = msg_id in self._mail['dst']['message_ids']
+                # The Bloom filter can find a Message-ID that is not in the mailbox
+                search = (not exists and self._mail['dst']['message_filter'] is not None
+                          and msg_id in self._mail['dst']['message_filter'])
+            # Most of the searches were already made in batches
+            if search and msg_id in self._mail['dst']['searched']:
+                exists, search = self._mail['dst']['searched'][msg_id], False
+            if search:
+                while True:
+                    try:
+                        self._select('dst', dst_mailbox)
+                        status, data = (self._mail['dst']['imap']
+                                        .search(None, f'HEADER Message-ID "{msg_id}"'))
+                        break
+                    except (imaplib.IMAP4.abort, OSError):
+                        self._reconnect()
+                    except imaplib.IMAP4.error:
+                        status = 'NO'
+                        break
+                exists = bool(status == 'OK' and data[0])
+            if exists:
+                if self._verbose:
+                    self._log_print(EMOJI[4] + self._msg['message_dst_exists']
+                                    .format(dst_mailbox))
+                return True
+        else:
+            # If the Message-ID does not exist, use the
+            # search criteria with From, To and SentOn
+            if self._verbose:
+                self._log_print(LF + EMOJI[1] + self._msg['messageid_not_found'])
+            if self._mail['dst']['created']:
+                return False
+            # Most of the searches were already made together
+            search_criteria = self._search_criteria(header)
+            exists = (self._mail['dst']['searched'].get(search_criteria)
+                      if search_criteria else False)
+            if exists is None:
+                while True:
+                    try:
+                        self._select('dst', dst_mailbox)
+                        status, data = self._mail['dst']['imap'].search(None, search_criteria)
+                        break
+                    except (imaplib.IMAP4.abort, OSError):
+                        self._reconnect()
+                    except imaplib.IMAP4.error:
+                        status = 'NO'
+                        break
+                exists = bool(status == 'OK' and data[0])
+            if exists:
+                if self._verbose:
+                    self._log_print(EMOJI[4] + self._msg['message_dst_exists']
+                                    .format(dst_mailbox))
                 return True
         return False
 
-    def _fetch_message(self, src_mailbox: str, message):
-        """Fetch the entire source message.
-        
+    def _uid_pipeline(self, imap, commands: list):
+        """Send several UID commands before reading their responses, so the round trips
+           of the commands overlap instead of adding up.
+
+            - imap: the IMAP connection;
+            - commands: the arguments of each UID command.
+        """
+
+        tags = [imap._command('UID', *command) for command in commands]
+        statuses = []
+        for tag in tags:
+            try:
+                statuses.append(imap._command_complete('UID', tag)[0])
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error:
+                statuses.append('BAD')
+        return statuses, imap._untagged_response('OK', [None], 'FETCH')[1]
+
+    def _fetch_messages(self, src_mailbox: str, messages: list, first: int = None):
+        """Fetch the entire source messages along with the date they were received and
+           their flags, sending the commands of all messages at once.
+
             - src_mailbox: the source email mailbox;
-            - message: the message uid of the source mailbox.
+            - messages: the message uids of the source mailbox;
+            - first: fetch only this number of bytes at the start of the bodies.
         """
 
+        # The date, flags and body of each message come in a single FETCH
+        part, body = (f'<0.{first}>', 'BODY[]<0>') if first else ('', 'BODY[]')
+        commands = [('FETCH', message, f'(INTERNALDATE FLAGS BODY.PEEK[]{part})')
+                    for message in messages]
         while True:
             try:
-                self._log_print(EMOJI[6] + self._msg['fetch_src_folder'].format(src_mailbox))
-                if self._mail['src']['imap'].state != 'SELECTED':
-                    self._mail['src']['imap'].select(src_mailbox)
-                status, data = self._mail['src']['imap'].fetch(message, '(BODY.PEEK[])')
+                if self._verbose:
+                    for _ in messages:
+                        self._log_print(EMOJI[6] + self._msg['fetch_src_folder']
+                                        .format(src_mailbox))
+                self._select('src', src_mailbox)
+                statuses, data = self._uid_pipeline(self._mail['src']['imap'], commands)
+                fetched = self._parse_fetch(data, uid = True)
                 break
-            except (imaplib.IMAP4.abort, TimeoutError):
+            except (imaplib.IMAP4.abort, OSError):
                 self._reconnect()
             except imaplib.IMAP4.error as error:
-                status, data = 'NO', error
+                statuses, data, fetched = [], error, {}
                 break
-        if status != 'OK':
-            self._log_print(EMOJI[11] + self._msg['fetch_src_error'].format(src_mailbox))
-            if self._debug:
-                self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
-            data = None
-        else:
-            data = data[0][1]
-        return data
 
-    def _append_message(self, dst_mailbox: str, received: str, message: str):
-        """Append source message on destination server.
-        
+        for message in messages:
+            items = fetched.get(message, {})
+            if body not in items:
+                self._log_print(EMOJI[11] + self._msg['fetch_src_error'].format(src_mailbox))
+                if self._debug:
+                    self._log_print(LF + EMOJI[3] + self._msg['except_error']
+                                    .format(statuses or data))
+                fetched.pop(message, None)
+                continue
+            items['BODY[]'] = items.pop(body)
+            if 'FLAGS' in items:
+                # The \Recent flag is set by the server and cannot be sent in APPEND
+                items['FLAGS'] = [flag for flag in REGEX_FLAGS.findall(items['FLAGS'])
+                                  if flag.upper() != '\\RECENT']
+            else:
+                self._log_print(EMOJI[11] + self._msg['flags_src_error'].format(src_mailbox))
+                if self._debug:
+                    self._log_print(LF + EMOJI[3] + self._msg['except_error']
+                                    .format(statuses or data))
+                items['FLAGS'] = None
+        return fetched
+
+    def _append_args(self, items: dict, header: bytes):
+        """Gets the flags and the date received of a fetched message, as sent in APPEND.
+
+            - items: the items of the FETCH response of the message;
+            - header: the header fields of the message.
+        """
+
+        # The INTERNALDATE of the source server is already in the APPEND format,
+        # the Date header is only used if the server did not return it, keeping its zone
+        received = items.get('INTERNALDATE')
+        if not received:
+            received = self._get_date(header)
+            if received:
+                # A Date with the -0000 zone is in UTC, without the local zone of the sender
+                if received.tzinfo is None:
+                    received = received.replace(tzinfo = timezone.utc)
+                received = imaplib.Time2Internaldate(received)
+
+        flags = ' '.join(items['FLAGS']) if items['FLAGS'] else None
+        return flags, received
+
+    def _stream_message(self, src_mailbox: str, dst_mailbox: str, message: bytes,
+                        header: bytes, size: int):
+        """Copy a message larger than FETCH_PIPELINE_BYTES in parts of STREAM_CHUNK_SIZE bytes,
+           each one written on the APPEND literal while the next one is fetched, so the message
+           is never entirely in memory. Returns None when the message must be fetched at once,
+           because the body does not have the size given by RFC822.SIZE or has line breaks
+           that are not CRLF, which change its size when normalized.
+
+            - src_mailbox: the source email mailbox;
             - dst_mailbox: the destination email mailbox;
-            - received: the date the message was received;
-            - message: the message body.
+            - message: the UID of the message;
+            - header: the header fields of the message;
+            - size: the size of the message in bytes.
         """
 
-        while True:
-            try:
+        items = self._fetch_messages(src_mailbox, [message], STREAM_CHUNK_SIZE).get(message)
+        if not items:
+            return None
+        flags, received = self._append_args(items, header)
+        src = self._mail['src']['imap']
+        conn = self._mail['dst']['pool'].get()
+        chunk, offset, carry = items['BODY[]'], 0, b''
+        status = tag = None
+        done = False
+        try:
+            if self._verbose:
                 self._log_print(EMOJI[5] + self._msg['append_dst_message'].format(dst_mailbox))
-                if self._mail['dst']['imap'].state != 'SELECTED':
-                    self._mail['dst']['imap'].select(dst_mailbox)
-                status, data = self._mail['dst']['imap'].append(dst_mailbox, None,
-                                                                received, message)
-                break
-            except (imaplib.IMAP4.abort, TimeoutError):
-                self._reconnect()
-            except imaplib.IMAP4.error as error:
-                status, data = 'NO', error
-                break
-        if status != 'OK':
-            if any(b'[OVERQUOTA]' in msg for msg in data):
-                status = 'OVERQUOTA'
-            self._log_print(EMOJI[11] + self._msg['append_dst_message_error'].format(dst_mailbox))
-            if self._debug:
-                self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
+            # A synchronizing literal lets the server refuse the message before it is sent
+            append = conn['imap']._new_tag()
+            args = [f'({flags})' if flags else None,
+                    imaplib.Time2Internaldate(received) if received else None, f'{{{size}}}']
+            conn['imap'].send(append + f" APPEND {dst_mailbox} {' '.join(filter(None, args))}"
+                              .encode() + imaplib.CRLF)
+            while conn['imap']._get_response():
+                if conn['imap'].tagged_commands[append]:
+                    done = True
+                    break
+
+            while not done:
+                # The line breaks split between two parts are checked with the byte before
+                # them, and a CR at the end with the part that follows it
+                end = offset + len(chunk)
+                text = carry + chunk
+                if (len(chunk) != min(STREAM_CHUNK_SIZE, size - offset)
+                    or REGEX_BARE_EOL.search(text, 0 if carry == b'\r' else len(carry),
+                                             len(text) - (end < size
+                                                          and text.endswith(b'\r')))):
+                    break
+                # The next part is requested before writing this one, and the last request
+                # asks for one more byte, so a body larger than its size is not truncated
+                if end < size:
+                    tag = src._command('UID', 'FETCH', message, '(BODY.PEEK[]<{}.{}>)'
+                                       .format(end, min(STREAM_CHUNK_SIZE, size - end + 1)))
+                conn['imap'].send(chunk)
+                if end >= size:
+                    conn['imap'].send(imaplib.CRLF)
+                    done = True
+                    break
+                pending, tag = tag, None
+                src._command_complete('UID', pending)
+                fetched = self._parse_fetch(src._untagged_response('OK', [None], 'FETCH')[1],
+                                            uid = True)
+                offset, carry = end, chunk[-1:]
+                chunk = fetched.get(message, {}).get(f'BODY[]<{offset}>')
+                if chunk is None:
+                    break
+
+            if done:
+                status = self._append_status(dst_mailbox,
+                                             *conn['imap']._command_complete('APPEND', append))
+        except (imaplib.IMAP4.abort, OSError):
+            pass
+        except imaplib.IMAP4.error as error:
+            if done:
+                status = self._append_status(dst_mailbox, 'NO', error)
+
+        try:
+            if status is None:
+                # The responses of the source not read yet are discarded
+                if tag is not None:
+                    try:
+                        src._command_complete('UID', tag)
+                    except (imaplib.IMAP4.error, OSError):
+                        pass
+                src.untagged_responses.pop('FETCH', None)
+                # A literal left unfinished is discarded by the server when the connection
+                # is closed, and a message sent whose response was lost is looked for
+                try:
+                    conn['imap'].shutdown()
+                except OSError:
+                    pass
+                result = self._auth_server(conn['cred'])
+                if result[0] == 'OK':
+                    conn['imap'] = result[1]
+                else:
+                    self._reconnect(conn)
+                if done:
+                    statuses = [None]
+                    self._append_confirm(conn, dst_mailbox, [(flags, received, header)],
+                                         statuses, [0])
+                    status = statuses[0]
+        finally:
+            self._mail['dst']['pool'].put(conn)
         return status
 
-    def _fetch_flags(self, src_mailbox: str, message):
-        """Get the message flags from the source email.
+    def _append_stream(self, imap, mailbox: str, messages: list):
+        """Same as `imaplib.IMAP4.append`, but writes the messages on the socket in blocks
+           without copying them to normalize the line breaks, all of them in a single
+           command when there are several (MULTIAPPEND).
+
+            - imap: the destination connection;
+            - mailbox: the destination email mailbox;
+            - messages: the flags, date received and body of each message.
+        """
+
+        # The literals of the UTF8 extension are written by imaplib, one message at a time,
+        # returning the first failure
+        if imap.utf8_enabled:
+            for message in messages:
+                status, data = imap.append(mailbox, *message)
+                if status != 'OK':
+                    break
+            return status, data
+        return imap._command_complete('APPEND', self._append_send(imap, mailbox, messages))
+
+    def _append_send(self, imap, mailbox: str, messages: list):
+        """Writes an APPEND command with the messages on the socket, returning its tag
+           to read the response. If the server rejects it while waiting for a continuation,
+           the rest is not written and the response is already stored.
+
+            - imap: the destination connection;
+            - mailbox: the destination email mailbox;
+            - messages: the flags, date received and body of each message.
+        """
+
+        tag = imap._new_tag()
+        command = tag + f' APPEND {mailbox}'.encode()
+        try:
+            for flags, date_time, message in messages:
+                if REGEX_BARE_EOL.search(message):
+                    message = REGEX_BARE_EOL.sub(imaplib.CRLF, message)
+                if flags and (flags[0], flags[-1]) != ('(', ')'):
+                    flags = f'({flags})'
+                date_time = imaplib.Time2Internaldate(date_time) if date_time else None
+                # Non-synchronizing literals (RFC 7888) are sent without waiting for the server
+                sync = not ('LITERAL+' in imap.capabilities
+                            or ('LITERAL-' in imap.capabilities
+                                and len(message) <= LITERAL_MINUS_MAX_SIZE))
+                args = [arg for arg in (flags, date_time) if arg]
+                args.append(f'{{{len(message)}}}' if sync else f'{{{len(message)}+}}')
+                imap.send(command + f" {' '.join(args)}".encode() + imaplib.CRLF)
+                while sync and imap._get_response():
+                    if imap.tagged_commands[tag]:
+                        return tag
+
+                # The last block is sent along with the text that follows the literal
+                view = memoryview(message)
+                last = max(len(view) - APPEND_BLOCK_SIZE, 0)
+                for i in range(0, last, APPEND_BLOCK_SIZE):
+                    imap.send(view[i:min(i + APPEND_BLOCK_SIZE, last)])
+                command = bytes(view[last:])
+            imap.send(command + imaplib.CRLF)
+        except OSError as error:
+            raise imap.abort(f'socket error: {error}') from error
+        return tag
+
+    def _append_messages(self, dst_mailbox: str, messages: list):
+        """Append source messages on destination server using a connection of the pool,
+           returning the status of each message.
+
+            - dst_mailbox: the destination email mailbox;
+            - messages: the flags, date received and body of each message.
+        """
+
+        conn = self._mail['dst']['pool'].get()
+        try:
+            capabilities = conn['imap'].capabilities
+            statuses = [None] * len(messages)
+            # If the single command fails, the messages are sent one by one to find the failed
+            if len(messages) > 1 and 'MULTIAPPEND' in capabilities:
+                statuses = self._append_batch(conn, dst_mailbox, messages)
+            pending = [i for i, status in enumerate(statuses) if status is None]
+            if len(pending) > 1 and ('LITERAL+' in capabilities or 'LITERAL-' in capabilities):
+                sent = self._append_pipeline(conn, dst_mailbox, [messages[i] for i in pending])
+            else:
+                sent = [self._append_message(conn, dst_mailbox, [messages[i]]) for i in pending]
+            for i, status in zip(pending, sent):
+                statuses[i] = status
+            return statuses
+        finally:
+            self._mail['dst']['pool'].put(conn)
+
+    def _append_batch(self, conn: dict, dst_mailbox: str, messages: list):
+        """Append source messages on destination server in a single command (MULTIAPPEND),
+           returning the status of each message, or None for the ones to send one by one.
+
+            - conn: the connection of the pool;
+            - dst_mailbox: the destination email mailbox;
+            - messages: the flags, date received and body of each message.
+        """
+
+        statuses = [None] * len(messages)
+        try:
+            if self._verbose:
+                self._log_print(EMOJI[5] + self._msg['append_dst_message'].format(dst_mailbox))
+            status, data = self._append_stream(conn['imap'], dst_mailbox, messages)
+        except (imaplib.IMAP4.abort, OSError):
+            # The command is atomic, so a message found means the whole batch was appended
+            # before the connection was lost
+            self._reconnect(conn)
+            self._append_confirm(conn, dst_mailbox, messages, statuses, range(len(messages)))
+            return ['OK' if 'OK' in statuses else None] * len(messages)
+        except imaplib.IMAP4.error:
+            return statuses
+
+        # Other failures are shown only by the messages that also fail one by one
+        if status == 'OK' or (isinstance(data, list)
+                              and any(b'[OVERQUOTA]' in msg for msg in data)):
+            return [self._append_status(dst_mailbox, status, data)] * len(messages)
+        return statuses
+
+    def _append_message(self, conn: dict, dst_mailbox: str, messages: list):
+        """Append a source message on destination server.
         
-            - src_mailbox: the source email mailbox;
-            - message: the message uid of the source mailbox.
+            - conn: the connection of the pool;
+            - dst_mailbox: the destination email mailbox;
+            - messages: the flags, date received and body of each message.
         """
 
         while True:
             try:
-                if self._mail['src']['imap'].state != 'SELECTED':
-                    self._mail['src']['imap'].select(src_mailbox)
-                status, data = self._mail['src']['imap'].fetch(message, '(FLAGS)')
+                if self._verbose:
+                    self._log_print(EMOJI[5] + self._msg['append_dst_message']
+                                    .format(dst_mailbox))
+                status, data = self._append_stream(conn['imap'], dst_mailbox, messages)
                 break
-            except (imaplib.IMAP4.abort, TimeoutError):
-                self._reconnect()
+            except (imaplib.IMAP4.abort, OSError):
+                self._reconnect(conn)
+                # Sent again only if it was not appended before the connection was lost
+                statuses = [None] * len(messages)
+                self._append_confirm(conn, dst_mailbox, messages, statuses,
+                                     range(len(messages)))
+                if 'OK' in statuses:
+                    return 'OK'
             except imaplib.IMAP4.error as error:
                 status, data = 'NO', error
                 break
-        if status != 'OK':
-            self._log_print(EMOJI[11] + self._msg['flags_src_error'].format(src_mailbox))
-            if self._debug:
-                self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
-            flags = None
-        else:
-            flags = re.findall(r'\\\w+', data[0].decode().upper())
-            if '\\RECENT' in flags:
-                flags.remove('\\RECENT')
-        return flags
+        return self._append_status(dst_mailbox, status, data)
 
-    def _store_flags(self, dst_mailbox: str, flags: str):
-        """Stores the flags from the original message to the destination email message.
-        
+    def _append_pipeline(self, conn: dict, dst_mailbox: str, messages: list):
+        """Append source messages on destination server with one command per message,
+           all of them sent before reading the responses, returning the status of each.
+
+            - conn: the connection of the pool;
             - dst_mailbox: the destination email mailbox;
-            - flags: the flags obtained from the source message.
+            - messages: the flags, date received and body of each message.
         """
 
-        while True:
+        statuses = [None] * len(messages)
+        while None in statuses:
+            # After a reconnection, only the messages without a response are sent again
+            pending = [i for i, status in enumerate(statuses) if status is None]
             try:
-                if self._mail['dst']['imap'].state != 'SELECTED':
-                    self._mail['dst']['imap'].select(dst_mailbox)
-                status, data = self._mail['dst']['imap'].search(None, 'ALL')
-                if status == 'OK':
-                    self._mail['dst']['imap'].store(data[0].split()[-1], '+FLAGS', flags)
-                break
-            except (imaplib.IMAP4.abort, TimeoutError):
-                self._reconnect()
+                tags = []
+                for i in pending:
+                    if self._verbose:
+                        self._log_print(EMOJI[5] + self._msg['append_dst_message']
+                                        .format(dst_mailbox))
+                    tags.append((i, self._append_send(conn['imap'], dst_mailbox,
+                                                      [messages[i]])))
+                for i, tag in tags:
+                    try:
+                        status, data = conn['imap']._command_complete('APPEND', tag)
+                    except imaplib.IMAP4.abort:
+                        raise
+                    except imaplib.IMAP4.error as error:
+                        status, data = 'NO', error
+                    statuses[i] = self._append_status(dst_mailbox, status, data)
+            # A server that closes the connection with commands not read yet resets it
+            except (imaplib.IMAP4.abort, OSError):
+                # The responses read while waiting for a continuation are kept as well
+                for i, tag in tags:
+                    response = conn['imap'].tagged_commands.get(tag)
+                    if statuses[i] is None and response:
+                        statuses[i] = self._append_status(dst_mailbox, *response)
+                self._reconnect(conn)
+                self._append_confirm(conn, dst_mailbox, messages, statuses,
+                                     [i for i, _ in tags if statuses[i] is None])
             except imaplib.IMAP4.error as error:
-                status, data = 'NO', error
-                break
+                for i in pending:
+                    if statuses[i] is None:
+                        statuses[i] = self._append_status(dst_mailbox, 'NO', error)
+        return statuses
+
+    def _append_confirm(self, conn: dict, dst_mailbox: str, messages: list, statuses: list,
+                        sent: list):
+        """Checks by the Message-ID which messages sent before the connection was lost were
+           appended even without a response, so they are not sent again.
+
+            - conn: the connection of the pool, already reconnected;
+            - dst_mailbox: the destination email mailbox;
+            - messages: the flags, date received and body of each message;
+            - statuses: the status of each message, updated with the ones appended;
+            - sent: the indexes of the messages sent without a response.
+        """
+
+        msg_ids = {}
+        for i in sent:
+            msg_id = self._get_messageid(REGEX_HEADER_END.split(messages[i][2], 1)[0])
+            if msg_id and REGEX_QUOTED_SAFE.match(msg_id):
+                msg_ids[i] = msg_id
+        if not msg_ids:
+            return
+        try:
+            if conn['imap'].select(dst_mailbox, readonly = True)[0] != 'OK':
+                return
+            found = self._find_messageids(conn['imap'], list(msg_ids.values()))
+            conn['imap'].close()
+        except (imaplib.IMAP4.error, OSError):
+            return
+        for i, msg_id in msg_ids.items():
+            if found and msg_id in found:
+                statuses[i] = 'OK'
+
+    def _append_status(self, dst_mailbox: str, status: str, data):
+        """Gets the status of an APPEND command, showing the error if it failed.
+
+            - dst_mailbox: the destination email mailbox;
+            - status: the status of the response;
+            - data: the data of the response or the exception raised.
+        """
+
         if status != 'OK':
-            self._log_print(EMOJI[11] + self._msg['flags_add_dst_error'].format(dst_mailbox))
+            if isinstance(data, list) and any(b'[OVERQUOTA]' in msg for msg in data):
+                status = 'OVERQUOTA'
+            self._log_print(EMOJI[11] + self._msg['append_dst_message_error'].format(dst_mailbox))
             if self._debug:
                 self._log_print(LF + EMOJI[3] + self._msg['except_error'].format(data))
+        return status
+
+    def _load_cache(self):
+        """Load the cache file with the UIDs of the messages already copied."""
+
+        try:
+            with open(CACHE_FILENAME, 'r', encoding = CODE) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return {}
+
+    def _save_cache(self):
+        """Save the UIDs of the messages already copied in the cache file."""
+
+        if self._cache is None:
+            return
+        if self._cache_lock is None:
+            cache = self._cache
+        elif 'src' not in self._mail:
+            # Interrupted before the migration of the process started, nothing to save
+            return
+        else:
+            # Other processes save the same file, so only this migration is updated
+            src_email = self._mail['src']['cred']['email']
+            dst_email = self._mail['dst']['cred']['email']
+            mailboxes = self._cache.get(src_email, {}).get(dst_email)
+            if mailboxes is None:
+                return
+            self._cache_lock.acquire()
+            cache = self._load_cache()
+            cache.setdefault(src_email, {})[dst_email] = mailboxes
+        try:
+            # The UIDs are kept as sets while running and saved as sorted lists
+            with open(CACHE_FILENAME + '.tmp', 'w', encoding = CODE) as file:
+                json.dump(cache, file, default = sorted)
+            os.replace(CACHE_FILENAME + '.tmp', CACHE_FILENAME)
+        finally:
+            if self._cache_lock is not None:
+                self._cache_lock.release()
+
+    def _get_copied(self, src_mailbox: str):
+        """Gets the UIDs of the source mailbox already copied in previous runs.
+
+            - src_mailbox: the source email mailbox.
+        """
+
+        self._mail['src']['copied'] = set()
+        self._mail['src']['cache'] = None
+        self._mail['src']['last_uid'] = 0
+        uidvalidity = self._mail['src'].get('uidvalidity')
+        if self._cache is None or not uidvalidity:
+            return self._mail['src']['copied']
+
+        # The UIDs are only valid while the UIDVALIDITY of the mailbox does not change
+        mailboxes = (self._cache.setdefault(self._mail['src']['cred']['email'], {})
+                     .setdefault(self._mail['dst']['cred']['email'], {}))
+        cache = mailboxes.get(src_mailbox)
+        if not cache or cache.get('uidvalidity') != uidvalidity:
+            cache = mailboxes[src_mailbox] = {'uidvalidity': uidvalidity, 'uids': []}
+        cache['uids'] = set(cache['uids'])
+        self._mail['src']['copied'] = cache['uids']
+        self._mail['src']['cache'] = cache
+        self._mail['src']['last_uid'] = cache.get('last_uid', 0)
+        return self._mail['src']['copied']
+
+    def _skip_copied(self, messages: list):
+        """Gets the messages not copied yet, moving the checkpoint of the mailbox past the
+        first ones already copied, so they are no longer searched in the next runs.
+
+            - messages: the UIDs of the source mailbox newer than the checkpoint.
+        """
+
+        copied = self._mail['src']['copied']
+        last_uid = self._mail['src']['last_uid']
+        for uid in sorted(int(message) for message in messages):
+            if uid not in copied:
+                break
+            last_uid = uid
+
+        # The UIDs up to the checkpoint are removed, keeping the cache file small
+        if self._mail['src']['cache'] is not None and last_uid > self._mail['src']['last_uid']:
+            self._mail['src']['cache']['last_uid'] = self._mail['src']['last_uid'] = last_uid
+            copied.difference_update([uid for uid in copied if uid <= last_uid])
+        return [message for message in messages
+                if int(message) > last_uid and int(message) not in copied]
+
+    def _wait_appends(self, appends: dict, return_when = ALL_COMPLETED):
+        """Wait for the messages being sent to the destination server.
+
+            - appends: the pending sends, each future mapped to the UID and Message-ID of its
+              messages, the destination mailbox and the copied UIDs and Message-IDs sets of
+              its mailboxes;
+            - return_when: when to stop waiting, as in `concurrent.futures.wait`.
+        """
+
+        overquota = False
+        error = None
+        done = wait(appends, return_when = return_when)[0]
+        for future in done:
+            messages, _, copied, message_ids = appends.pop(future)
+            # The sends that finished are saved before the error of another one is raised,
+            # so their messages are not sent again in the next runs
+            try:
+                statuses = future.result()
+            except Exception as exception:
+                error = error or exception
+                statuses = [None] * len(messages)
+            for (message, msg_id), status in zip(messages, statuses):
+                if status == 'OK':
+                    copied.add(int(message))
+                elif msg_id and message_ids is not None:
+                    message_ids.discard(msg_id)
+                if status == 'OVERQUOTA':
+                    overquota = True
+        if error:
+            raise error
+        return overquota
+
+    def _submit_appends(self, executor: ThreadPoolExecutor, appends: dict, dst_mailbox: str,
+                        batch: list):
+        """Send messages to the destination server in the background, waiting for the sends
+           in progress if there are too many, returning True if the mailbox is over quota.
+
+            - executor: the threads that send the messages to the destination server;
+            - appends: the pending sends, as in `_wait_appends`;
+            - dst_mailbox: the destination email mailbox;
+            - batch: the UID, Message-ID and the flags, date received and body of each message.
+        """
+
+        future = executor.submit(self._append_messages, dst_mailbox,
+                                 [message[2] for message in batch])
+        appends[future] = ([message[:2] for message in batch], dst_mailbox,
+                           self._mail['src']['copied'], self._mail['dst']['message_ids'])
+        # A connection shared with the main thread sends one batch at a time
+        return ((self._mail['dst']['shared']
+                 or len(appends) >= 2 * self._mail['dst']['connections'])
+                and self._wait_appends(appends, FIRST_COMPLETED))
 
     def _migrate(self, src_cred: dict, dst_cred: dict):
         """Migrate all folders along with messages from source email to destination.
@@ -792,68 +2120,327 @@ class SyncImapEmail:
             - dst_cred: the destination email credential.
         """
 
-        self._mail = {'src': {'cred': src_cred}, 'dst': {'cred': dst_cred}}
+        # While watching the inboxes, the Message-IDs of the destination mailboxes already
+        # read are kept for the next migrations, and updated with the messages sent
+        mailboxes_ids = (self._mailboxes_ids.setdefault(self._session_key(dst_cred), {})
+                         if self._watch else {})
+        self._mail = {'src': {'cred': src_cred},
+                      'dst': {'cred': dst_cred, 'mailboxes_ids': mailboxes_ids}}
         self._log_print(LF + EMOJI[0] + self._msg['migrate_start'].format(
             self._mail['src']['cred']['email']))
 
-        if not self._connect() or not self._get_mailboxes_info():
+        if not self._connect():
             return
 
-        # Loop through all source mailboxes
+        # Messages are sent in parallel by the connections of the destination pool
+        executor = ThreadPoolExecutor(max_workers = self._mail['dst']['connections'])
+        appends = {}
+        try:
+            finished = (self._get_mailboxes_info()
+                        and self._migrate_mailboxes(executor, appends))
+            # Wait for all messages to be sent
+            if self._wait_appends(appends):
+                finished = False
+        except ReconnectError:
+            # Only this credential is stopped, the next ones are still migrated
+            finished = False
+            for future in appends:
+                future.cancel()
+            self._log_print(LF + EMOJI[11] + self._msg['migrate_stopped']
+                            .format(self._mail['src']['cred']['email']))
+        self._save_cache()
+        executor.shutdown()
+        if finished:
+            self._log_print(LF + EMOJI[0] + self._msg['migrate_finish']
+                            .format(self._mail['src']['cred']['email']))
+
+        self._disconnect()
+
+    def _migrate_mailboxes(self, executor: ThreadPoolExecutor, appends: dict):
+        """Loop through all source mailboxes, returning False if the migration was stopped.
+
+            - executor: the threads that send the messages to the destination server;
+            - appends: the pending sends, as in `_wait_appends`.
+        """
+
+        # The small messages of each group are sent together to servers with MULTIAPPEND
+        # or with non-synchronizing literals, as in `_append_messages`
+        together = (not self._mail['dst']['imap'].utf8_enabled
+                    and any(capability in self._mail['dst']['imap'].capabilities
+                            for capability in ('MULTIAPPEND', 'LITERAL+', 'LITERAL-')))
+        # The literals of the UTF8 extension are only written by imaplib, as in `_append_stream`
+        stream = not self._mail['dst']['imap'].utf8_enabled
+
         break_all_loop = False
-        for src_mailbox in self._mail['src']['all_mailboxes']:
+        for flags, src_mailbox in self._mail['src']['all_mailboxes']:
             if break_all_loop:
                 break
 
             # Mailboxes that are not copied
-            if re.search(r'\\[Noselect|All|Flagged]', src_mailbox):
+            if SKIP_MAILBOX_FLAGS.intersection(flags.upper().split()):
                 continue
 
-            src_mailbox = src_mailbox.split(f'"{self._mail["src"]["separator"]}"')[-1].strip()
             if self._set_src_mailbox(src_mailbox):
-                allmessages = self._get_allmessages(src_mailbox)
+                # Messages copied in previous runs are skipped before any request,
+                # and the ones up to the checkpoint of the mailbox are not even searched
+                self._get_copied(src_mailbox)
+                allmessages = self._get_allmessages(src_mailbox, self._mail['src']['last_uid'])
+                if allmessages is None:
+                    continue
+                allmessages = self._skip_copied(allmessages)
                 if not allmessages:
+                    self._log_print(EMOJI[1] + self._msg['folder_src_copied'].format(src_mailbox))
                     continue
                 self._mail['src']['all_messages'] = allmessages
                 dst_mailbox = self._find_foldername(src_mailbox)
+                # Sends of previous mailboxes run in the background, unless they
+                # go to the same destination mailbox, whose Message-IDs are read now
+                if (any(pending[1] == dst_mailbox for pending in appends.values())
+                    and self._wait_appends(appends)):
+                    break_all_loop = True
+                    break
                 if not self._set_dst_mailbox(dst_mailbox):
                     continue
+                # A mailbox created now is empty, so there are no messages to compare,
+                # and the Message-IDs of a mailbox already read are reused
+                if self._mail['dst']['created']:
+                    message_ids = set(), None
+                elif dst_mailbox in self._mail['dst']['mailboxes_ids']:
+                    message_ids = self._mail['dst']['mailboxes_ids'][dst_mailbox]
+                else:
+                    message_ids = self._get_dst_messageids(dst_mailbox)
+                if message_ids[0] is not None:
+                    self._mail['dst']['mailboxes_ids'][dst_mailbox] = message_ids
+                (self._mail['dst']['message_ids'],
+                 self._mail['dst']['message_filter']) = message_ids
             else:
                 continue
 
-            # Loop through all messages in the source mailbox
-            for message in self._mail['src']['all_messages']:
-                if break_all_loop:
-                    break
+            # Fetch all message headers of the source mailbox in batches
+            headers, sizes = self._fetch_headers(src_mailbox, self._mail['src']['all_messages'])
 
-                header = self._fetch_header(src_mailbox, message)
-                if not header or self._message_exists(dst_mailbox, header):
+            # The Message-IDs that only the destination server can confirm
+            # are searched in batches, instead of one command per message
+            self._mail['dst']['searched'] = self._search_messageids(dst_mailbox,
+                                                                    headers.values())
+
+            # Loop through all messages in the source mailbox to find the ones to copy
+            messages = []
+            for message in self._mail['src']['all_messages']:
+                header = headers.get(message)
+                if not header:
+                    continue
+                if self._message_exists(dst_mailbox, header):
+                    self._mail['src']['copied'].add(int(message))
                     continue
 
-                body_message = self._fetch_message(src_mailbox, message)
-                if body_message:
-                    # Get the date the original message was received
-                    try:
-                        received = parsedate_to_datetime(header['Date'])
-                        received = mktime(received.timetuple())
-                        received = imaplib.Time2Internaldate(received)
-                    except (TypeError, ValueError):
-                        received = None
+                # The Message-ID is added before sending to skip duplicates in the source
+                msg_id = self._get_messageid(header)
+                if msg_id and self._mail['dst']['message_ids'] is not None:
+                    self._mail['dst']['message_ids'].add(msg_id)
+                messages.append((message, header, msg_id))
 
-                    status = self._append_message(dst_mailbox, received, body_message)
+            # Fetch the messages in groups, whose commands are sent together
+            for group in self._fetch_groups(messages, sizes):
+                if break_all_loop:
+                    break
+                self._keepalive()
+
+                # A message larger than a whole group is copied in parts, as in `_stream_message`
+                message, header, msg_id = group[0]
+                if stream and sizes.get(message, 0) > FETCH_PIPELINE_BYTES:
+                    status = self._stream_message(src_mailbox, dst_mailbox, message, header,
+                                                  sizes[message])
                     if status == 'OK':
-                        flags = self._fetch_flags(src_mailbox, message)
-                        if flags:
-                            flags = ' '.join(flags)
-                            self._store_flags(dst_mailbox, flags)
-                    elif status == 'OVERQUOTA':
+                        self._mail['src']['copied'].add(int(message))
+                    elif status and msg_id and self._mail['dst']['message_ids'] is not None:
+                        self._mail['dst']['message_ids'].discard(msg_id)
+                    if status == 'OVERQUOTA':
+                        break_all_loop = True
+                    if status:
+                        continue
+
+                fetched = self._fetch_messages(src_mailbox, [message[0] for message in group])
+
+                batch, batch_size = [], 0
+                for message, header, msg_id in group:
+                    body_message = fetched.get(message)
+                    if not body_message:
+                        if msg_id and self._mail['dst']['message_ids'] is not None:
+                            self._mail['dst']['message_ids'].discard(msg_id)
+                        continue
+
+                    flags, received = self._append_args(body_message, header)
+                    batch.append((message, msg_id, (flags, received, body_message['BODY[]'])))
+                    batch_size += len(body_message['BODY[]'])
+                    if together and batch_size < MULTIAPPEND_MAX_SIZE:
+                        continue
+                    if self._submit_appends(executor, appends, dst_mailbox, batch):
                         break_all_loop = True
+                        break
+                    batch, batch_size = [], 0
+                if (batch and not break_all_loop
+                    and self._submit_appends(executor, appends, dst_mailbox, batch)):
+                    break_all_loop = True
 
-        if not break_all_loop:
-            self._log_print(LF + EMOJI[0] + self._msg['migrate_finish']
-                            .format(self._mail['src']['cred']['email']))
+            # Messages still being sent are saved on the next save
+            self._save_cache()
 
-        self._disconnect()
+        return not break_all_loop
+
+    def _watch_connect(self, credentials: list):
+        """Connect to the source servers and select the inboxes to wait for new messages.
+
+            - credentials: the complete list of credentials of the source and destination emails.
+        """
+
+        watching = {}
+        for index, credential in enumerate(credentials):
+            status, data = self._auth_server(credential['src'])
+            if status != 'OK':
+                continue
+            conn = {'cred': credential['src'], 'imap': data}
+            if self._watch_select(conn):
+                watching[index] = conn
+            else:
+                try:
+                    conn['imap'].logout()
+                except (imaplib.IMAP4.error, OSError):
+                    pass
+        return watching
+
+    def _watch_select(self, conn: dict):
+        """Select the inbox of the source email, returning False if the server does not
+           notify new messages (IDLE).
+
+            - conn: the connection and credential of the source email.
+        """
+
+        if 'IDLE' not in conn['imap'].capabilities:
+            self._log_print(LF + EMOJI[11] + self._msg['watch_no_idle']
+                            .format(conn['cred']['email']))
+            return False
+        try:
+            if conn['imap'].select('INBOX', readonly = True)[0] == 'OK':
+                # The messages already in the inbox are copied by the migration
+                conn['imap'].untagged_responses.clear()
+                return True
+        except (imaplib.IMAP4.error, OSError):
+            pass
+        self._log_print(LF + EMOJI[11] + self._msg['select_src_folder_error'].format('INBOX'))
+        return False
+
+    def _watch_wait(self, watching: dict):
+        """Wait with the IDLE command until the servers notify new messages, returning the
+           indexes of the credentials with new messages and of the connections lost.
+
+            - watching: the connections to the inbox of the source emails, by credential index.
+        """
+
+        new, lost = [], []
+        for index, conn in watching.items():
+            try:
+                # The messages that arrived while copying are notified in the NOOP response
+                conn['imap'].noop()
+                if conn['imap'].untagged_responses.pop('EXISTS', None):
+                    new.append(index)
+                conn['imap'].untagged_responses.clear()
+            except (imaplib.IMAP4.error, OSError):
+                lost.append(index)
+        if new or lost:
+            return new, lost
+
+        idling = {}
+        for index, conn in watching.items():
+            imap = conn['imap']
+            try:
+                tag = imap._new_tag()
+                imap.send(tag + b' IDLE' + imaplib.CRLF)
+                # The server confirms with a continuation, or rejects completing the command
+                while imap._get_response() is not None:
+                    if imap.tagged_commands[tag]:
+                        imap._command_complete('IDLE', tag)
+                        break
+                else:
+                    idling[index] = tag
+            except (imaplib.IMAP4.error, OSError):
+                lost.append(index)
+
+        # Any notification ends the wait, which is restarted before the servers end it
+        if idling and not lost:
+            if not any(self._watch_pending(watching[index]['imap']) for index in idling):
+                select([watching[index]['imap'].sock for index in idling], [], [], IDLE_INTERVAL)
+        elif not lost:
+            sleep(IDLE_INTERVAL)
+
+        for index, tag in idling.items():
+            imap = watching[index]['imap']
+            try:
+                imap.send(b'DONE' + imaplib.CRLF)
+                imap._command_complete('IDLE', tag)
+                # Other notifications, such as flags changed, are not used
+                if imap.untagged_responses.pop('EXISTS', None):
+                    new.append(index)
+                imap.untagged_responses.clear()
+            except (imaplib.IMAP4.error, OSError):
+                lost.append(index)
+        return new, lost
+
+    def _watch_pending(self, imap):
+        """Check if a notification was already read along with the IDLE continuation, since
+           the data kept in the buffers is not seen by `select`.
+
+            - imap: the connection to the inbox of the source email.
+        """
+
+        if 'EXISTS' in imap.untagged_responses:
+            return True
+        if isinstance(imap, imaplib.IMAP4_SSL) and imap.sock.pending():
+            return True
+        # Without data in the buffer, peeking in non-blocking mode returns nothing
+        timeout = imap.sock.gettimeout()
+        imap.sock.settimeout(0)
+        try:
+            return bool(imap.file.peek(1))
+        except (BlockingIOError, SSLWantReadError):
+            return False
+        finally:
+            imap.sock.settimeout(timeout)
+
+    def _watch_inbox(self, credentials: list, watching: dict):
+        """Copy the new messages of the source emails as their servers notify them.
+
+            - credentials: the complete list of credentials of the source and destination emails;
+            - watching: the connections to the inbox of the source emails, by credential index.
+        """
+
+        if self._cache is None and not self._no_cache:
+            self._cache = self._load_cache()
+
+        self._log_print(LF + EMOJI[10] + self._msg['watch_inbox'])
+        while watching:
+            new, lost = self._watch_wait(watching)
+            for index in lost:
+                # The messages that arrived while disconnected are copied as well
+                try:
+                    self._reconnect(watching[index])
+                except ReconnectError:
+                    del watching[index]
+                    continue
+                if not self._watch_select(watching[index]):
+                    del watching[index]
+                    continue
+                new.append(index)
+
+            # Only the messages after the checkpoint of each mailbox are searched
+            for index in new:
+                credential = credentials[index]
+                self._log_print(LF + EMOJI[4] + self._msg['watch_new_msgs']
+                                .format(credential['src']['email']))
+                self._migrate(credential['src'], credential['dst'])
+            # The sessions are kept for the next messages, checked with a NOOP when reused
+            if new:
+                self._log_print(LF + EMOJI[10] + self._msg['watch_inbox'])
 
     def load_credentials(self) -> list:
         """Load JSON credentials file."""
@@ -861,7 +2448,10 @@ class SyncImapEmail:
         try:
             with open('credentials.json', 'r', encoding = CODE) as file:
                 credentials = json.load(file)
-            return credentials
+            # The structure is checked once here instead of failing in the middle of the run
+            if self._check_credentials(credentials):
+                return credentials
+            print(EMOJI[11] + self._msg['cred_json_error'])
         except json.decoder.JSONDecodeError:
             print(EMOJI[11] + self._msg['cred_json_error'])
         except FileNotFoundError:
@@ -869,6 +2459,24 @@ class SyncImapEmail:
             print(EMOJI[1] + self._msg['cred_copy_file'])
         return None
 
+    def _check_credentials(self, credentials) -> bool:
+        """Check that each credential has the source and destination with the required fields.
+
+            - credentials: the content of the credentials file.
+        """
+
+        if not isinstance(credentials, list):
+            return False
+        for creds in credentials:
+            if not isinstance(creds, dict):
+                return False
+            for key in ('src', 'dst'):
+                cred = creds.get(key)
+                if not isinstance(cred, dict) or not all(
+                        isinstance(cred.get(field), str) for field in CREDENTIAL_FIELDS):
+                    return False
+        return True
+
     def generate_token(self, email: str):
         """Check OAUTH2 credential and create/refresh email token.
 
@@ -882,9 +2490,13 @@ class SyncImapEmail:
             self._log_print(EMOJI[1] + self._msg['oauth_required'])
             self._log_print('https://cloud.google.com/docs/authentication/client-libraries')
             sys.exit()
-        creds = None
-        token_filename = 'token_{}.json'.format(re.sub(r'[^\w._-]+', '_', email))
-        if os.path.exists(token_filename):
+        token_filename = 'token_{}.json'.format(REGEX_TOKEN_FILENAME.sub('_', email))
+        # Each connection logged in gets a token, so the credentials already loaded are
+        # reused while they are valid, without reading and writing the file again
+        creds = self._tokens.get(email)
+        if creds and creds.valid:
+            return creds.token, token_filename
+        if not creds and os.path.exists(token_filename):
             try:
                 creds = Credentials.from_authorized_user_file(token_filename, scopes)
             except ValueError:
@@ -895,6 +2507,7 @@ class SyncImapEmail:
                 # Save the credentials for the next run
                 with open(token_filename, 'w', encoding = CODE) as token:
                     token.write(creds.to_json())
+                self._tokens[email] = creds
                 return creds.token, token_filename
             if not creds:
                 self._log_print(LF + EMOJI[1] + self._msg['oauth_create_token'].format(email))
@@ -947,11 +2560,47 @@ class SyncImapEmail:
             if pargs.attempts and pargs.attempts.isdigit():
                 self._attempts = int(pargs.attempts)
 
+            if pargs.connections and pargs.connections.isdigit():
+                self._connections = max(int(pargs.connections), 1)
+
+            if pargs.accounts and pargs.accounts.isdigit():
+                self._accounts = max(int(pargs.accounts), 1)
+
             if pargs.debug:
                 self._debug = True
 
-        for credential in credentials:
-            self._migrate(credential['src'], credential['dst'])
+            if pargs.verbose:
+                self._verbose = True
+
+            if pargs.no_cache:
+                self._no_cache = True
+
+            if pargs.watch:
+                self._watch = True
+
+        # The inboxes are watched from before the migration, so the messages
+        # that arrive while copying are also notified
+        self._watching = self._watch_connect(credentials) if self._watch else {}
+        self._keepalive_time = monotonic()
+
+        processes = min(self._accounts, len(credentials))
+        if processes > 1:
+            # Each process loads the cache and saves only its own migration, while
+            # the inboxes watched are kept alive by this one
+            with Pool(processes, self._init_process, (Lock(),)) as pool:
+                result = pool.map_async(self._migrate_process, credentials, chunksize = 1)
+                while not result.ready():
+                    result.wait(KEEPALIVE_INTERVAL)
+                    self._keepalive()
+                result.get()
+        else:
+            if not self._no_cache:
+                self._cache = self._load_cache()
+            for credential in credentials:
+                self._migrate(credential['src'], credential['dst'])
+            # The sessions are reused by the migrations of the new messages watched
+            if not self._watching:
+                self._close_sessions()
 
         self._log_print(LF + EMOJI[1] + self._msg['migrate_success'])
         if hasattr(self, '_log_filename'):
@@ -966,5 +2615,8 @@ class SyncImapEmail:
         self._log_print(EMOJI[2] + 'LTC: ltc1qr9fs9zz4wmqx5xhdm6l6andz8h9plk0wnj74nc')
         self._log_print(EMOJI[2] + 'ZEC: t1S2YxATvCYr5TrTykUXSZ9vC3SWRphTWrF')
 
+        if self._watching:
+            self._watch_inbox(credentials, self._watching)
+
 if __name__ == '__main__':
     SyncImapEmail()